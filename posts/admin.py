@@ -1,12 +1,94 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 
-from .models import Comment, Follow, Group, Post
+from . import search
+from .forms import LimitedUploadMixin
+from .models import Comment, Follow, Group, Post, User
+from .paginators import cached_count
 
+# Changelists never count further than this: past it, the exact figure
+# is of no use to anybody paging through the list.
+COUNT_LIMIT = 10000
 
-class PostAdmin(admin.ModelAdmin):
+
+def prefix(field, term):
+    # A range over the unique username index: unlike LIKE 'term%' it is
+    # served from a plain B-tree index by every database.
+    return Q(**{f"{field}__gte": term, f"{field}__lt": term + "\uffff"})
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            model = queryset.model
+            found = cached_count(
+                f"admin:{model._meta.label_lower}",
+                model._default_manager.all(),
+            )
+            if found is not None:
+                return found
+        return queryset.order_by()[:COUNT_LIMIT + 1].count()
+
+
+class FastAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    username_search_fields = ()
+
+    def username_filter(self, search_term):
+        found = Q()
+        for field in self.username_search_fields:
+            found |= prefix(field, search_term)
+        return found
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usernames are matched by prefix over their index instead of
+        # with LIKE '%...%' over every row.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(self.username_filter(search_term)), False
+
+
+class TextSearchAdmin(FastAdmin):
+    def get_ordering(self, request):
+        # Found rows are listed by relevance unless a column is sorted.
+        if request.GET.get(SEARCH_VAR):
+            return ("-search_rank",)
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        # The text is looked up in the full-text index instead of with
+        # an unindexed LIKE '%...%' over every row.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return search.search(
+            queryset,
+            search_term,
+            self.username_filter(search_term),
+        ), False
+
+
+class PostAdminForm(LimitedUploadMixin, forms.ModelForm):
+    pass
+
+
+class PostAdmin(TextSearchAdmin):
+    form = PostAdminForm
     list_display = ("text", "pub_date", "author", "group")
-    search_fields = ("text",)
+    list_select_related = ("author", "group")
+    search_fields = ("text", "author__username")
+    username_search_fields = ("author__username",)
     list_filter = ("pub_date",)
+    autocomplete_fields = ("author", "group")
     empty_value_display = "-пусто-"
 
 
@@ -18,19 +100,32 @@ class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(TextSearchAdmin):
     list_display = ("post", "author", "text", "created")
-    search_fields = ("text", "author")
+    list_select_related = ("post", "author")
+    search_fields = ("text", "author__username")
+    username_search_fields = ("author__username",)
     list_filter = ("created",)
+    autocomplete_fields = ("post", "author")
     empty_value_display = "-пусто-"
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(FastAdmin):
     list_display = ("user", "author",)
-    search_fields = ("user", "author",)
+    list_select_related = ("user", "author")
+    search_fields = ("user__username", "author__username",)
+    username_search_fields = ("user__username", "author__username",)
+    autocomplete_fields = ("user", "author")
+
+
+class UserAdmin(FastAdmin, BaseUserAdmin):
+    search_fields = ("username",)
+    username_search_fields = ("username",)
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
@@ -0,0 +1,316 @@
+import copy
+import json
+from urllib.parse import urlsplit
+
+from django.http import HttpResponse, JsonResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .counters import get_stats
+from .models import Comment, Follow, Group, Post, User
+from .paginators import POSTS_PER_PAGE, decode_cursor, encode_cursor, seek
+from .timeline import FollowFeed
+
+MAX_LIMIT = 100
+MAX_BATCH = 20
+# Fields clients may ask for and the values() lookups they come from.
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+JSON_OPTIONS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def error(message, status=400):
+    return JsonResponse(
+        {'error': message}, status=status, json_dumps_params=JSON_OPTIONS,
+    )
+
+
+def cached(request, key, load):
+    """Return ``load()``, computed once per request.
+
+    Sub-requests of a batch share their parent's cache, so lookups they
+    have in common only run once.
+    """
+    if not hasattr(request, '_api_cache'):
+        request._api_cache = {}
+    if key not in request._api_cache:
+        request._api_cache[key] = load()
+    return request._api_cache[key]
+
+
+def find_user(request, username):
+    return cached(request, ('user', username), lambda: (
+        User.objects.select_related('stats').filter(username=username).first()
+    ))
+
+
+def find_group(request, slug):
+    return cached(request, ('group', slug), lambda: (
+        Group.objects.filter(slug=slug).first()
+    ))
+
+
+def is_following(request, author):
+    if not request.user.is_authenticated:
+        return False
+    return cached(request, ('following', author.pk), lambda: (
+        Follow.objects.filter(user=request.user, author=author).exists()
+    ))
+
+
+def requested_fields(request, known=FIELDS):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(known)
+    fields = list(dict.fromkeys(
+        field.strip() for field in fields.split(',') if field.strip()
+    ))
+    unknown = [field for field in fields if field not in known]
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}.')
+    return fields
+
+
+def requested_limit(request):
+    try:
+        limit = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        raise BadRequest('Параметр limit должен быть числом.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def requested_cursor(request):
+    token = request.GET.get('cursor')
+    if not token:
+        return None, 1
+    cursor = decode_cursor(token)
+    if cursor is None:
+        raise BadRequest('Неверный курсор.')
+    value, pk, number, _ = cursor
+    return (value, pk), number
+
+
+def serialize(rows, fields, known=FIELDS):
+    # Rows come straight from values(): no model instance is built.
+    image_storage = Post._meta.get_field('image').storage
+    results = []
+    for row in rows:
+        item = {field: row[known[field]] for field in fields}
+        if item.get('image'):
+            item['image'] = image_storage.url(item['image'])
+        elif 'image' in item:
+            item['image'] = None
+        results.append(item)
+    return results
+
+
+def page_response(request, rows, fields, limit, number,
+                  known=FIELDS, field='pub_date'):
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(
+            rows[-1][field], rows[-1]['id'], number + 1,
+        )
+        next_url = f'{request.path}?{params.urlencode()}'
+    return JsonResponse(
+        {'results': serialize(rows, fields, known), 'next': next_url},
+        json_dumps_params=JSON_OPTIONS,
+    )
+
+
+def feed_response(request, queryset=None, feed=None):
+    """Answer with a page of ``queryset`` or of a ``FollowFeed``.
+
+    Pages are cursor-paginated by ``(pub_date, id)``, ``?fields=`` picks
+    the fields and ``?limit=`` the page size.
+    """
+    try:
+        fields = requested_fields(request)
+        limit = requested_limit(request)
+        after, number = requested_cursor(request)
+    except BadRequest as bad_request:
+        return error(str(bad_request))
+    lookups = {'id', 'pub_date', *(FIELDS[field] for field in fields)}
+    if feed is None:
+        rows = seek(queryset.values(*lookups), after, limit=limit + 1)
+    else:
+        keys = feed.seek_keys(after, limit=limit + 1)
+        found = {
+            row['id']: row
+            for row in Post.objects.filter(
+                pk__in=[post_id for _, post_id in keys],
+            ).values(*lookups)
+        }
+        rows = [found[post_id] for _, post_id in keys if post_id in found]
+    return page_response(request, rows, fields, limit, number)
+
+
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group = find_group(request, slug)
+    if group is None:
+        return error('Группа не найдена.', status=404)
+    return feed_response(request, group.posts.all())
+
+
+def profile(request, username):
+    author = find_user(request, username)
+    if author is None:
+        return error('Пользователь не найден.', status=404)
+    return feed_response(request, author.posts.all())
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация.', status=401)
+    return feed_response(request, feed=FollowFeed(request.user))
+
+
+def user_detail(request, username):
+    author = find_user(request, username)
+    if author is None:
+        return error('Пользователь не найден.', status=404)
+    stats = get_stats(author)
+    return JsonResponse({
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+        'comments_count': stats.comments_count,
+    }, json_dumps_params=JSON_OPTIONS)
+
+
+def follow_state(request, username):
+    author = find_user(request, username)
+    if author is None:
+        return error('Пользователь не найден.', status=404)
+    return JsonResponse(
+        {'following': is_following(request, author)},
+        json_dumps_params=JSON_OPTIONS,
+    )
+
+
+def post_detail(request, post_id):
+    try:
+        fields = requested_fields(request)
+    except BadRequest as bad_request:
+        return error(str(bad_request))
+    row = (
+        Post.objects
+        .filter(pk=post_id)
+        .values(*{FIELDS[field] for field in fields})
+        .first()
+    )
+    if row is None:
+        return error('Запись не найдена.', status=404)
+    return JsonResponse(
+        serialize([row], fields)[0], json_dumps_params=JSON_OPTIONS,
+    )
+
+
+def post_comments(request, post_id):
+    try:
+        fields = requested_fields(request, COMMENT_FIELDS)
+        limit = requested_limit(request)
+        after, number = requested_cursor(request)
+    except BadRequest as bad_request:
+        return error(str(bad_request))
+    lookups = {
+        'id', 'created', *(COMMENT_FIELDS[field] for field in fields)
+    }
+    rows = seek(
+        Comment.objects.filter(post_id=post_id).values(*lookups),
+        after,
+        limit=limit + 1,
+        field='created',
+    )
+    return page_response(
+        request, rows, fields, limit, number, COMMENT_FIELDS, 'created',
+    )
+
+
+def sub_request(request, url):
+    # A shallow copy shares the user, the session and the request cache
+    # of the batch; sub-requests run one after another in this thread,
+    # on its database connection.
+    parts = urlsplit(url)
+    sub = copy.copy(request)
+    sub.method = 'GET'
+    sub.path = sub.path_info = parts.path
+    sub.META = {**request.META, 'QUERY_STRING': parts.query}
+    sub.GET = QueryDict(parts.query)
+    return sub
+
+
+def run(request, url):
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return error('Адрес не найден.', status=404)
+    if match.func.__module__ != __name__ or match.func is batch:
+        return error('Адрес не входит в API.', status=404)
+    sub = sub_request(request, url)
+    sub.resolver_match = match
+    return match.func(sub, *match.args, **match.kwargs)
+
+
+@csrf_exempt
+@require_POST
+def batch(request):
+    """Answer several API GETs in one call.
+
+    The body is ``{"requests": [{"id": ..., "url": ...}, ...]}``; every
+    answer carries the ``id``, ``status`` and ``body`` of its request.
+    Only reads are run, so the endpoint needs no CSRF token.
+    """
+    try:
+        found = json.loads(request.body)['requests']
+        if not isinstance(found, list):
+            raise TypeError
+        requests = [(item.get('id'), str(item['url'])) for item in found]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return error('Ожидается {"requests": [{"id": ..., "url": ...}]}.')
+    if len(requests) > MAX_BATCH:
+        return error(f'Не больше {MAX_BATCH} запросов за раз.')
+    # Created here, so that every sub-request copy shares it.
+    request._api_cache = {}
+    answers = []
+    for request_id, url in requests:
+        response = run(request, url)
+        # Bodies are already JSON: they are spliced in, not parsed again.
+        head = json.dumps(
+            {'id': request_id, 'status': response.status_code},
+            **JSON_OPTIONS,
+        )
+        answers.append(
+            head[:-1].encode() + b',"body":' + response.content + b'}'
+        )
+    return HttpResponse(
+        b'{"responses":[' + b','.join(answers) + b']}',
+        content_type='application/json',
+    )
@@ -0,0 +1,37 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS)
+
+
+def _call(function, args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Background task %s failed', function.__name__)
+
+
+def _run(function, args):
+    try:
+        _call(function, args)
+    finally:
+        connections.close_all()
+
+
+def defer(function, *args):
+    """Run ``function(*args)`` in a background worker thread.
+
+    The task is only handed over once the current transaction commits:
+    started earlier, it would not see the rows it is meant to process.
+    """
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        # Worker threads cannot share an in-memory database, such as the
+        # one tests run on, so the task runs in place instead.
+        transaction.on_commit(lambda: _call(function, args))
+        return
+    transaction.on_commit(lambda: _executor.submit(_run, function, args))
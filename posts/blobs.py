@@ -0,0 +1,120 @@
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Post, StoredImage
+from .storage import is_hashed
+
+BATCH_SIZE = 1000
+# References taken by ContentAddressedStorage.save() on this thread and
+# not yet claimed by the post the file was saved for.
+_taken = threading.local()
+
+
+# Only files named by ContentAddressedStorage are counted: anything else
+# predates it and is left to migrate_image_storage.
+def acquire(name, count=1):
+    if not name or not is_hashed(name):
+        return
+    # The row may be deleted as unused between the two queries: then it
+    # is created again and the update retried.
+    while not StoredImage.objects.filter(name=name).update(
+        references=F('references') + count,
+    ):
+        StoredImage.objects.get_or_create(name=name)
+
+
+def take(name):
+    """Reference ``name`` before the storage decides not to write it.
+
+    Without it, the file could be deleted as unused between that check
+    and the save of the post, which then points at a missing file.
+    """
+    if not name or not is_hashed(name):
+        return
+    acquire(name)
+    if not hasattr(_taken, 'names'):
+        _taken.names = Counter()
+    _taken.names[name] += 1
+
+
+def claim(name):
+    """Count a reference of a saved post to ``name``.
+
+    A reference taken when the file was stored is used up instead of
+    counting a new one.
+    """
+    names = getattr(_taken, 'names', None)
+    if names and names[name]:
+        names[name] -= 1
+        return
+    acquire(name)
+
+
+def release(name):
+    if not name or not is_hashed(name):
+        return
+    updated = StoredImage.objects.filter(
+        name=name, references__gt=0,
+    ).update(references=F('references') - 1)
+    if updated:
+        transaction.on_commit(lambda: _delete_unused(name))
+
+
+def _delete_unused(name):
+    with transaction.atomic():
+        unused = StoredImage.objects.select_for_update().filter(
+            name=name, references=0,
+        )
+        if not unused.exists():
+            return
+        unused.delete()
+        # Still under the row lock: an upload of the same file waits in
+        # take() and then finds the file gone, so it writes it again.
+        Post._meta.get_field('image').storage.delete(name)
+
+
+def reconcile(batch_size=BATCH_SIZE):
+    """Recount the references of stored images from the posts using them.
+
+    Rows inserted without ``acquire()``, by ``import_data`` for one, get
+    their references here. Images are walked by name, one grouped
+    aggregate per batch. Yields the number of processed and fixed names
+    for every batch. Files are never deleted.
+    """
+    used = Post.objects.exclude(image='').exclude(image__isnull=True)
+    last_name = ''
+    while True:
+        actual = dict(
+            used
+            .filter(image__gt=last_name)
+            .order_by('image')
+            .values_list('image')
+            .annotate(total=Count('id'))[:batch_size]
+        )
+        if not actual:
+            break
+        last_name = max(actual)
+        actual = {
+            name: total for name, total in actual.items() if is_hashed(name)
+        }
+        stored = StoredImage.objects.in_bulk(list(actual))
+        missing = [
+            StoredImage(name=name, references=total)
+            for name, total in actual.items() if name not in stored
+        ]
+        drifted = [
+            StoredImage(name=name, references=total)
+            for name, total in actual.items()
+            if name in stored and stored[name].references != total
+        ]
+        with transaction.atomic():
+            StoredImage.objects.bulk_create(missing, ignore_conflicts=True)
+            StoredImage.objects.bulk_update(drifted, ['references'])
+        yield len(actual), len(missing) + len(drifted)
+    orphaned = StoredImage.objects.filter(references__gt=0).exclude(
+        name__in=used.values('image'),
+    ).update(references=0)
+    yield 0, orphaned
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+KEY = 'namespace:{}'
+FEED = 'feed'
+COMMENTS = 'comments'
+# Every page depends on it: bumped after writes that send no signals,
+# such as import_data.
+SITE = 'site'
+
+
+# Groups and authors are keyed by their URL slugs, so validating a page
+# from its URL needs no database lookup.
+def group_ns(slug):
+    return f'group:{slug}'
+
+
+def author_ns(username):
+    return f'author:{username}'
+
+
+def post_ns(post_id):
+    return f'post:{post_id}'
+
+
+def _fresh():
+    # Versions are clock readings rather than counters: a version evicted
+    # from the cache never comes back with a value that fragments cached
+    # under the old one still use, and the newest version of a page's
+    # namespaces doubles as its modification time.
+    return time.time_ns()
+
+
+def versions(*namespaces):
+    keys = {KEY.format(name): name for name in (SITE, *namespaces)}
+    found = cache.get_many(keys)
+    result = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, _fresh(), None)
+            found[key] = cache.get(key)
+        result[name] = found[key]
+    return result
+
+
+def version(*namespaces):
+    found = versions(*namespaces)
+    return '.'.join(str(found[name]) for name in (SITE, *namespaces))
+
+
+def modified(found):
+    return datetime.fromtimestamp(max(found.values()) / 10 ** 9, timezone.utc)
+
+
+def bump(*namespaces):
+    stamp = _fresh()
+    cache.set_many({KEY.format(name): stamp for name in namespaces}, None)
+
+
+def bump_post(post, *groups):
+    namespaces = [FEED, author_ns(post.author.username), post_ns(post.pk)]
+    for group in {post.group, *groups}:
+        if group is not None:
+            namespaces.append(group_ns(group.slug))
+    bump(*namespaces)
@@ -0,0 +1,79 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from . import thumbnails
+from .templatetags.viewer_tags import DEFERRED
+
+TEMPLATE = 'includes/post_item.html'
+TIMEOUT = 60 * 60 * 24
+HITS = 'cards:hits'
+MISSES = 'cards:misses'
+
+
+def card_key(post, group_page=False):
+    # Everything the card shows goes into the key, so an edited post, a
+    # new comment or a renamed group simply lands under a new key.
+    digest = hashlib.md5('\x00'.join(map(str, (
+        post.text,
+        post.image,
+        _picture_name(post),
+        post.pub_date.isoformat(),
+        post.author.username,
+        post.group.slug if post.group_id else '',
+        post.group.title if post.group_id else '',
+        getattr(post, 'comments_count', ''),
+    ))).encode()).hexdigest()
+    return f'card:{post.pk}:{int(group_page)}:{digest}'
+
+
+def _picture_name(post):
+    picture = getattr(post, 'thumbnail', None)
+    return picture.img.name if picture else ''
+
+
+def render_cards(posts, group_page=False):
+    """Return the rendered cards of ``posts`` in order.
+
+    All cached cards are fetched with one ``get_many``; only the misses
+    are rendered and stored back with one ``set_many``. Per-viewer parts
+    are left for ``{% personalize %}`` to fill in.
+    """
+    thumbnails.attach(posts)
+    keys = [card_key(post, group_page) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            missing[key] = render_to_string(TEMPLATE, {
+                'post': post,
+                'group_page': group_page,
+                DEFERRED: True,
+            })
+    if missing:
+        cache.set_many(missing, TIMEOUT)
+    _count(HITS, len(keys) - len(missing))
+    _count(MISSES, len(missing))
+    return [
+        cached[key] if key in cached else missing[key] for key in keys
+    ]
+
+
+def _count(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def stats():
+    counters = cache.get_many([HITS, MISSES])
+    return counters.get(HITS, 0), counters.get(MISSES, 0)
+
+
+def reset_stats():
+    cache.delete_many([HITS, MISSES])
@@ -0,0 +1,81 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import caching
+
+
+def index_namespaces(request):
+    return [caching.FEED]
+
+
+def group_namespaces(request, slug):
+    return [caching.group_ns(slug)]
+
+
+def profile_namespaces(request, username):
+    return [caching.author_ns(username)]
+
+
+def post_namespaces(request, username, post_id):
+    return [caching.author_ns(username), caching.post_ns(post_id)]
+
+
+def sets_cookies(request, response):
+    # The CSRF cookie is only added by the middleware, after the view.
+    return bool(response.cookies) or request.META.get('CSRF_COOKIE_USED')
+
+
+def conditional_page(namespaces, comments=False):
+    """Answer repeated GETs of a page with 304 without rendering it.
+
+    Validators come from the cache versions of the namespaces the page is
+    built from, as returned by ``namespaces(request, *args, **kwargs)``.
+    Cards show comment counts to authorized users only, so ``comments``
+    pages add the global comments namespace for them. Anonymous responses
+    are marked public so a reverse proxy may serve them, unless they set
+    cookies.
+    """
+    def versions(request, *args, **kwargs):
+        if not hasattr(request, '_page_versions'):
+            names = namespaces(request, *args, **kwargs)
+            if comments and request.user.is_authenticated:
+                names.append(caching.COMMENTS)
+            request._page_versions = caching.versions(*names)
+        return request._page_versions
+
+    def etag(request, *args, **kwargs):
+        found = versions(request, *args, **kwargs)
+        validator = '|'.join([
+            str(request.user.pk or 0),
+            request.get_full_path(),
+            *(f'{name}={found[name]}' for name in sorted(found)),
+        ])
+        return hashlib.md5(validator.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        return caching.modified(versions(request, *args, **kwargs))
+
+    def decorator(view):
+        conditional_view = condition(etag, last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+            if (request.user.is_authenticated or
+                    sets_cookies(request, response)):
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=settings.PAGE_CACHE_MAX_AGE,
+                )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,133 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Comment, Follow, Post, User, UserStats
+
+BATCH_SIZE = 1000
+COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+    'comments_count': (Comment, 'author'),
+}
+
+
+def _add(rows, field, delta):
+    # A single UPDATE ... SET field = field + delta: concurrent writers
+    # never lose each other's increments.
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    rows.update(**{field: F(field) + delta})
+
+
+def bump(user_id, field, delta):
+    # Rows that do not exist yet are left alone: they are created with
+    # exact values on first read, so there is nothing to drift from.
+    if user_id is None:
+        return
+    _add(UserStats.objects.filter(pk=user_id), field, delta)
+
+
+def bump_comments(post_id, delta):
+    _add(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def count(user_ids):
+    stats = {
+        user_id: UserStats(user_id=user_id) for user_id in user_ids
+    }
+    for field, (model, lookup) in COUNTERS.items():
+        rows = (
+            model.objects
+            .filter(**{f'{lookup}__in': user_ids})
+            .order_by()
+            .values_list(lookup)
+            .annotate(total=Count('id'))
+        )
+        for user_id, total in rows:
+            setattr(stats[user_id], field, total)
+    return stats
+
+
+def get_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        pass
+    stats = count([user.pk])[user.pk]
+    try:
+        with transaction.atomic():
+            stats.save(force_insert=True)
+    except IntegrityError:
+        stats = UserStats.objects.get(pk=user.pk)
+    user.stats = stats
+    return stats
+
+
+def reconcile(batch_size=BATCH_SIZE):
+    """Recompute stored counters, one batch of users at a time.
+
+    Yields the number of processed and fixed rows for every batch.
+    """
+    last_id = 0
+    fields = list(COUNTERS)
+    while True:
+        user_ids = list(
+            User.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return
+        last_id = user_ids[-1]
+        actual = count(user_ids)
+        stored = UserStats.objects.in_bulk(user_ids)
+        missing = [
+            stats for user_id, stats in actual.items()
+            if user_id not in stored
+        ]
+        drifted = [
+            stats for user_id, stats in actual.items()
+            if user_id in stored and any(
+                getattr(stats, field) != getattr(stored[user_id], field)
+                for field in fields
+            )
+        ]
+        with transaction.atomic():
+            UserStats.objects.bulk_create(missing, ignore_conflicts=True)
+            UserStats.objects.bulk_update(drifted, fields)
+        yield len(user_ids), len(missing) + len(drifted)
+
+
+def reconcile_comments(batch_size=BATCH_SIZE):
+    """Recompute ``Post.comments_count``, one batch of posts at a time.
+
+    Every batch costs one grouped aggregate over its comments. Yields
+    the number of processed and fixed posts for every batch.
+    """
+    last_id = 0
+    while True:
+        stored = dict(
+            Post.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'comments_count')[:batch_size]
+        )
+        if not stored:
+            return
+        last_id = max(stored)
+        actual = dict(
+            Comment.objects
+            .filter(post_id__in=stored)
+            .order_by()
+            .values_list('post')
+            .annotate(total=Count('id'))
+        )
+        drifted = [
+            Post(pk=post_id, comments_count=actual.get(post_id, 0))
+            for post_id, count in stored.items()
+            if actual.get(post_id, 0) != count
+        ]
+        Post.objects.bulk_update(drifted, ['comments_count'])
+        yield len(stored), len(drifted)
@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+FEED = 'feed'
+
+
+def group_topic(group_id):
+    return f'group:{group_id}'
+
+
+def author_topic(author_id):
+    return f'author:{author_id}'
+
+
+def post_topics(post):
+    topics = [FEED, author_topic(post.author_id)]
+    if post.group_id:
+        topics.append(group_topic(post.group_id))
+    return topics
+
+
+def encode_positions(positions):
+    """``{'feed': 3}`` -> ``'feed=3'``, the ``id:`` of a stream's events."""
+    return ','.join(
+        f'{topic}={sequence}' for topic, sequence in sorted(positions.items())
+    )
+
+
+def decode_positions(token):
+    positions = {}
+    for part in (token or '').split(','):
+        topic, _, sequence = part.partition('=')
+        if topic and sequence.isdigit():
+            positions[topic] = int(sequence)
+    return positions
+
+
+class Subscription:
+    """New posts on a set of topics, counted until they are collected.
+
+    ``positions`` holds the sequence number of the last post seen on
+    every topic. Feeds never get one post on two of their topics, so the
+    posts missed since other positions are the sum of the differences.
+    """
+
+    def __init__(self, hub, topics, positions, seen=None):
+        self.hub = hub
+        self.topics = frozenset(topics)
+        self.positions = positions
+        self.pending = 0
+        if seen:
+            # Topics the last stream did not have, such as a newly
+            # followed author, count from now.
+            self.pending = sum(
+                max(sequence - seen.get(topic, sequence), 0)
+                for topic, sequence in positions.items()
+            )
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        if self.pending:
+            self.ready.set()
+
+    def notify(self, positions):
+        with self.lock:
+            self.pending += 1
+            for topic in self.topics.intersection(positions):
+                self.positions[topic] = max(
+                    self.positions[topic], positions[topic],
+                )
+            self.ready.set()
+
+    def wait(self, timeout):
+        """Return the number of posts published since the last call.
+
+        Also returns the positions those posts bring the subscription
+        to. Blocks for up to ``timeout`` seconds while there are none; an
+        idle subscriber costs a sleeping thread and nothing else.
+        """
+        self.ready.wait(timeout)
+        with self.lock:
+            pending, self.pending = self.pending, 0
+            self.ready.clear()
+            return pending, dict(self.positions)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """In-process publish/subscribe of new posts by topic.
+
+    Publishing only touches the subscribers of the post's topics; nobody
+    polls the database. Every topic numbers its posts, so a reconnecting
+    stream learns how many it missed. Only streams of this process hear
+    of the posts saved by it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.sequences = {}
+
+    def subscribe(self, topics, seen=None):
+        topics = frozenset(topics)
+        with self.lock:
+            subscription = Subscription(
+                self,
+                topics,
+                {topic: self.sequences.get(topic, 0) for topic in topics},
+                seen,
+            )
+            for topic in topics:
+                self.subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for topic in subscription.topics:
+                found = self.subscribers.get(topic)
+                if found is None:
+                    continue
+                found.discard(subscription)
+                if not found:
+                    del self.subscribers[topic]
+
+    def publish(self, topics):
+        with self.lock:
+            positions = {}
+            for topic in topics:
+                positions[topic] = self.sequences.get(topic, 0) + 1
+            self.sequences.update(positions)
+            # A subscriber of several of the topics hears of the post once.
+            targets = set().union(
+                *(self.subscribers.get(topic, ()) for topic in topics)
+            )
+        # Subscribers are woken outside the hub lock, so that neither new
+        # connections nor other posts wait for them.
+        for subscription in targets:
+            subscription.notify(positions)
+        return len(targets)
+
+    def count(self):
+        with self.lock:
+            return len(set().union(*self.subscribers.values()))
+
+
+hub = Hub()
+# Waking thousands of subscribers takes a while. A thread of its own does
+# it, off the request and without queueing behind thumbnail rendering.
+_publisher = ThreadPoolExecutor(max_workers=1)
+
+
+def publish_post(post):
+    # Subscribers are told once the post can actually be read.
+    topics = post_topics(post)
+    transaction.on_commit(lambda: _publisher.submit(hub.publish, topics))
+
+
+class Stream:
+    """Server-Sent Events of a subscription, for StreamingHttpResponse.
+
+    The response closes the stream when the client goes away, started
+    or not, and with it the subscription. The stream itself ends after
+    ``EVENTS_MAX_AGE`` seconds and the browser opens a new one, so that
+    no tab holds a server thread for good. Events carry the positions of
+    the subscription as their ``id:``; the browser sends the last one
+    back as ``Last-Event-ID``, and posts of the gap are counted in.
+    """
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+
+    def __iter__(self):
+        yield f'retry: {settings.EVENTS_RETRY * 1000}\n\n'
+        # The first message always has an id, so the browser has one to
+        # send back even if no post comes before the stream ends. Posts
+        # missed since the last stream come with it.
+        timeout = 0
+        deadline = time.monotonic() + settings.EVENTS_MAX_AGE
+        while True:
+            count, positions = self.subscription.wait(timeout)
+            if count:
+                data = json.dumps({'count': count})
+                yield (
+                    f'id: {encode_positions(positions)}\n'
+                    f'event: posts\ndata: {data}\n\n'
+                )
+            elif not timeout:
+                yield f'id: {encode_positions(positions)}\n\n'
+            else:
+                # Keeps proxies from dropping the idle connection.
+                yield ': ping\n\n'
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            timeout = min(settings.EVENTS_HEARTBEAT, left)
+
+    def close(self):
+        self.subscription.close()
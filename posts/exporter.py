@@ -0,0 +1,112 @@
+import csv
+import json
+
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 2000
+# Lines are sent in blocks of about this many characters rather than one
+# by one.
+BLOCK_SIZE = 64 * 1024
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Exported fields, named as import_data expects them, and the values()
+# lookups they come from.
+FIELDS = {
+    'post': (
+        ('id', 'id'),
+        ('text', 'text'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('pub_date', 'pub_date'),
+        ('image', 'image'),
+    ),
+    'comment': (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    ),
+    'follow': (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    ),
+}
+MODELS = {'post': Post, 'comment': Comment, 'follow': Follow}
+
+
+def user_queryset(kind, user):
+    if kind == 'follow':
+        return Follow.objects.filter(user=user)
+    return MODELS[kind].objects.filter(author=user)
+
+
+def group_queryset(group):
+    return Post.objects.filter(group=group)
+
+
+def records(kind, queryset, chunk_size=CHUNK_SIZE):
+    """Yield the rows of ``queryset`` as export records, by id.
+
+    Rows are read as plain values through a chunked ``.iterator()``, so
+    no model instances are built and memory does not grow with the
+    size of the export.
+    """
+    names, lookups = zip(*FIELDS[kind])
+    rows = (
+        queryset
+        .order_by('pk')
+        .values_list(*lookups)
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+def _isoformat(value):
+    # Unlike DjangoJSONEncoder, keeps microseconds: dates survive a round
+    # trip through import_data exactly.
+    return value.isoformat()
+
+
+class _Line:
+    # csv.writer only needs an object with a write() method.
+    def write(self, value):
+        return value
+
+
+def lines(kind, found, format_):
+    """Yield ``found`` records as JSONL or CSV lines, header included."""
+    if format_ == 'jsonl':
+        for record in found:
+            yield json.dumps(
+                record, default=_isoformat, ensure_ascii=False,
+            ) + '\n'
+        return
+    writer = csv.writer(_Line())
+    names = [name for name, _ in FIELDS[kind]]
+    yield writer.writerow(names)
+    for record in found:
+        yield writer.writerow(
+            ['' if record[name] is None else record[name] for name in names]
+        )
+
+
+def blocks(found_lines, size=BLOCK_SIZE):
+    """Join ``found_lines`` into UTF-8 blocks of about ``size`` characters."""
+    block = []
+    length = 0
+    for line in found_lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(block).encode()
+            block = []
+            length = 0
+    if block:
+        yield ''.join(block).encode()
+
+
+def export(kind, queryset, format_):
+    return blocks(lines(kind, records(kind, queryset), format_))
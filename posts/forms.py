@@ -1,10 +1,59 @@
 from django import forms
+from django.conf import settings
 from django.forms.widgets import Textarea
 
+from . import uploads
 from .models import Comment, Post
 
 
-class PostForm(forms.ModelForm):
+class LimitedUploadMixin:
+    """Rejects files cut off by ``LimitedUploadHandler``.
+
+    The handler serves the whole site, so every form that takes files
+    has to use this mixin, the admin ones included.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A cut off file has no content to parse: it is taken out of the
+        # form data and reported once the fields are cleaned.
+        self.oversized = [
+            name for name, upload in self.files.items()
+            if getattr(upload, "oversized", False)
+        ]
+        if self.oversized:
+            self.files = self.files.copy()
+            for name in self.oversized:
+                del self.files[name]
+
+    def _clean_fields(self):
+        super()._clean_fields()
+        for name in self.oversized:
+            # Replaces a "required" error the missing file may have got.
+            self._errors.pop(name, None)
+            self.add_error(name, forms.ValidationError(
+                "Файл изображения больше %(limit)d МБ.",
+                code="file_size",
+                params={"limit": settings.POST_IMAGE_MAX_SIZE // 2 ** 20},
+            ))
+
+
+class PostForm(LimitedUploadMixin, forms.ModelForm):
+    def clean_image(self):
+        image = self.cleaned_data.get("image")
+        # Only fresh uploads carry the header parsed by ImageField.
+        header = getattr(image, "image", None)
+        if header is None:
+            return image
+        width, height = header.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                "Изображение больше %(limit)d мегапикселей.",
+                code="pixels",
+                params={"limit": settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+            )
+        return uploads.master(image, header)
+
     class Meta:
         model = Post
         fields = ("group", "text", "image",)
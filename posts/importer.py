@@ -0,0 +1,271 @@
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 10000
+FORMATS = ('jsonl', 'csv')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def read(stream, format_):
+    """Yield the records of a JSONL or CSV ``stream`` one at a time."""
+    if format_ == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Lookups:
+    """Username, slug and post id -> id maps filled as records come in.
+
+    Keys a batch needs and the maps lack are looked up with one query
+    per batch; keys that do not exist are remembered as None.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+        self.posts = {}
+
+    @staticmethod
+    def _resolve(found, model, field, keys):
+        missing = {key for key in keys if key and key not in found}
+        if not missing:
+            return
+        found.update(dict.fromkeys(missing))
+        found.update(
+            model.objects
+            .filter(**{f'{field}__in': missing})
+            .values_list(field, 'pk')
+        )
+
+    def prepare(self, records, user_fields, group_fields, post_fields=()):
+        self._resolve(self.users, User, 'username', {
+            record.get(field) for record in records for field in user_fields
+        })
+        self._resolve(self.groups, Group, 'slug', {
+            record.get(field) for record in records for field in group_fields
+        })
+        self._resolve(self.posts, Post, 'pk', {
+            _int(record.get(field))
+            for record in records for field in post_fields
+        })
+
+    def user(self, username):
+        found = self.users.get(username)
+        if found is None:
+            raise RecordError(f'нет пользователя {username!r}')
+        return found
+
+    def group(self, slug):
+        if not slug:
+            return None
+        found = self.groups.get(slug)
+        if found is None:
+            raise RecordError(f'нет группы {slug!r}')
+        return found
+
+    def post(self, post_id):
+        found = self.posts.get(_int(post_id))
+        if found is None:
+            raise RecordError(f'нет записи {post_id!r}')
+        return found
+
+
+def _int(value):
+    # Ids come as numbers from JSONL and as strings from CSV.
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _id(record):
+    value = record.get('id')
+    return int(value) if value not in (None, '') else None
+
+
+def _date(record, field):
+    value = record.get(field)
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise RecordError(f'неверная дата {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def build_user(record, lookups):
+    return User(
+        id=_id(record),
+        username=record['username'],
+        first_name=record.get('first_name') or '',
+        last_name=record.get('last_name') or '',
+        email=record.get('email') or '',
+        # Password hashes move as they are; without one the account
+        # cannot log in until the password is reset.
+        password=record.get('password') or make_password(None),
+        date_joined=_date(record, 'date_joined'),
+    )
+
+
+def build_group(record, lookups):
+    return Group(
+        id=_id(record),
+        slug=record['slug'],
+        title=record['title'],
+        description=record.get('description') or '',
+    )
+
+
+def build_post(record, lookups):
+    return Post(
+        id=_id(record),
+        text=record['text'],
+        author_id=lookups.user(record['author']),
+        group_id=lookups.group(record.get('group')),
+        pub_date=_date(record, 'pub_date'),
+        image=record.get('image') or None,
+    )
+
+
+def build_comment(record, lookups):
+    return Comment(
+        id=_id(record),
+        post_id=lookups.post(record['post']),
+        author_id=lookups.user(record['author']),
+        text=record['text'],
+        created=_date(record, 'created'),
+    )
+
+
+def build_follow(record, lookups):
+    user_id = lookups.user(record['user'])
+    author_id = lookups.user(record['author'])
+    if user_id == author_id:
+        raise RecordError('подписка на самого себя')
+    return Follow(user_id=user_id, author_id=author_id)
+
+
+def new_follows(follows):
+    # Follows have no unique constraint to ignore conflicts on, so pairs
+    # that already exist are dropped by hand.
+    pairs = {(follow.user_id, follow.author_id): follow for follow in follows}
+    existing = Follow.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs},
+        author_id__in={author_id for _, author_id in pairs},
+    ).values_list('user_id', 'author_id')
+    for pair in existing:
+        pairs.pop(pair, None)
+    return list(pairs.values())
+
+
+# model, record builder, username, slug and post id fields, duplicate
+# filter
+MODELS = {
+    'user': (User, build_user, (), (), (), None),
+    'group': (Group, build_group, (), (), (), None),
+    'post': (Post, build_post, ('author',), ('group',), (), None),
+    'comment': (Comment, build_comment, ('author',), (), ('post',), None),
+    'follow': (
+        Follow, build_follow, ('user', 'author'), (), (), new_follows,
+    ),
+}
+
+
+@contextmanager
+def _keeping_dates(model):
+    # bulk_create() stamps auto_now_add fields with the current time,
+    # while imported rows keep the dates they had at the source.
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _reset_sequence(model):
+    # Rows inserted with explicit ids leave PostgreSQL sequences behind.
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def run(name, records, skip=0, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+        on_error=None):
+    """Insert ``records`` of the ``name`` model with ``bulk_create``.
+
+    Every ``chunk_size`` records are written in one transaction, in
+    ``bulk_create`` batches of ``batch_size``, after which the number of
+    records read so far is yielded along with the written and skipped
+    counts of the chunk. The first ``skip`` records are passed over, so
+    an interrupted import resumes from its last yielded position. Rows
+    that already exist under the same id or unique key are left alone.
+    Bad records are reported to ``on_error(number, error)`` and skipped.
+
+    Signals are not sent: counters, timelines and the search index have
+    to be rebuilt afterwards.
+    """
+    model, build, user_fields, group_fields, post_fields, dedupe = (
+        MODELS[name]
+    )
+    lookups = Lookups()
+    numbered = islice(enumerate(records, 1), skip, None)
+    with _keeping_dates(model):
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                break
+            written = skipped = 0
+            with transaction.atomic():
+                for start in range(0, len(chunk), batch_size):
+                    batch = chunk[start:start + batch_size]
+                    lookups.prepare(
+                        [record for _, record in batch],
+                        user_fields,
+                        group_fields,
+                        post_fields,
+                    )
+                    objects = []
+                    for number, record in batch:
+                        try:
+                            objects.append(build(record, lookups))
+                        except KeyError as error:
+                            skipped += 1
+                            if on_error:
+                                on_error(number, f'нет поля {error}')
+                        except (TypeError, ValueError) as error:
+                            skipped += 1
+                            if on_error:
+                                on_error(number, error)
+                    if dedupe and objects:
+                        objects = dedupe(objects)
+                    model.objects.bulk_create(objects, ignore_conflicts=True)
+                    written += len(objects)
+            yield chunk[-1][0], written, skipped
+    _reset_sequence(model)
@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+# A private cache, emptied before every request: each one pays for its
+# queries and rendering, and the caches of a running site are left alone.
+COLD_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-api',
+    },
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время ответа и размер HTML-лент и их JSON API. Все '
+        'созданные данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--reads', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(CACHES=COLD_CACHE):
+                self.run(options['posts'], options['reads'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, posts, reads):
+        author = User.objects.create_user(username='bench_api_author')
+        reader = User.objects.create_user(username='bench_api_reader')
+        group = Group.objects.create(title='Бенчмарк', slug='bench-api')
+        Follow.objects.create(user=reader, author=author)
+        for i in range(posts):
+            Post.objects.create(text=f'Пост {i}', author=author, group=group)
+        client = Client()
+        client.force_login(reader)
+        pages = (
+            ('index', reverse('index'), reverse('api_index')),
+            (
+                'group',
+                reverse('group', args=[group.slug]),
+                reverse('api_group', args=[group.slug]),
+            ),
+            (
+                'profile',
+                reverse('profile', args=[author.username]),
+                reverse('api_profile', args=[author.username]),
+            ),
+            ('follow', reverse('follow_index'), reverse('api_follow_index')),
+        )
+        for name, html_url, api_url in pages:
+            html_time, html_size = self.measure(client, html_url, reads)
+            api_time, api_size = self.measure(client, api_url, reads)
+            self.stdout.write(
+                f'{name}: html {html_time * 1000:.1f}ms {html_size} B, '
+                f'api {api_time * 1000:.1f}ms {api_size} B '
+                f'({html_time / api_time:.1f}x faster)'
+            )
+
+    def measure(self, client, url, reads):
+        timings = []
+        for _ in range(reads):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), len(response.content)
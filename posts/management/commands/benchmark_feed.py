@@ -0,0 +1,89 @@
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters, timeline
+from posts.models import Follow, Post
+from posts.paginators import POSTS_PER_PAGE
+
+User = get_user_model()
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет стоимость публикации поста и чтения ленты подписок '
+        'для авторов с разным числом подписчиков. Все созданные данные '
+        'откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--followers',
+            type=int,
+            nargs='+',
+            default=[10, 10000, 1000000],
+        )
+        parser.add_argument('--posts', type=int, default=50)
+        parser.add_argument('--reads', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for followers in options['followers']:
+            try:
+                with transaction.atomic():
+                    self.run(followers, options['posts'], options['reads'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def run(self, followers, posts, reads):
+        author = User.objects.create_user(username=f'bench_{followers}')
+        self.create_followers(author, followers)
+        # bulk_create() sends no signals: the stored follower count the
+        # fan-out limit is checked against is set by hand.
+        counters.count([author.pk])[author.pk].save()
+        pulled = timeline.refresh_pulled(author.pk)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author) for i in range(posts)
+        )
+        if not pulled:
+            timeline.backfill_followers(author.pk)
+
+        started = time.perf_counter()
+        Post.objects.create(text='Новый пост', author=author)
+        write = time.perf_counter() - started
+
+        reader = Follow.objects.filter(author=author).first().user
+        feed = timeline.FollowFeed(reader)
+        started = time.perf_counter()
+        for _ in range(reads):
+            feed.seek(limit=POSTS_PER_PAGE + 1)
+        read = (time.perf_counter() - started) / reads
+
+        self.stdout.write(
+            f'followers={followers} mode={"pull" if pulled else "push"} '
+            f'write={write * 1000:.1f}ms read={read * 1000:.2f}ms'
+        )
+
+    def create_followers(self, author, count):
+        usernames = (f'bench_{author.pk}_{i}' for i in range(count))
+        while True:
+            batch = list(islice(usernames, BATCH_SIZE))
+            if not batch:
+                return
+            User.objects.bulk_create(
+                User(username=username) for username in batch
+            )
+            Follow.objects.bulk_create(
+                Follow(user_id=user_id, author=author)
+                for user_id in User.objects.filter(
+                    username__in=batch
+                ).values_list('pk', flat=True)
+            )
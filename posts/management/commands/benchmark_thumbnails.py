@@ -0,0 +1,95 @@
+import statistics
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from posts import thumbnails
+
+# The single crop every device used to download.
+BASELINE = ('960x339', {'crop': 'center', 'upscale': True})
+SAMPLE_SIZE = (3000, 2000)
+
+
+def sample():
+    # Noise over a gradient compresses roughly like a photo, unlike a
+    # flat colour.
+    noise = Image.effect_noise(SAMPLE_SIZE, 40).convert('RGB')
+    gradient = Image.linear_gradient('L').resize(SAMPLE_SIZE).convert('RGB')
+    content = BytesIO()
+    Image.blend(noise, gradient, 0.6).save(content, 'JPEG', quality=90)
+    return content.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет размер и время кодирования каждого варианта картинки '
+        'поста по сравнению с прежней единственной JPEG-обрезкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--image',
+            help='Путь к исходной картинке; по умолчанию синтетическая.',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.name = options['image'] or 'sample.jpg'
+        if options['image']:
+            with open(options['image'], 'rb') as image:
+                self.data = image.read()
+        else:
+            self.data = sample()
+        repeat = options['repeat']
+        geometry, baseline_options = BASELINE
+        # The old crop went out at sorl's default quality. Encoded again
+        # at the variants' quality, it tells the savings of the lower
+        # quality apart from those of the widths and formats.
+        old, _, old_time = self.encode(geometry, baseline_options, repeat)
+        baseline, _, baseline_time = self.encode(
+            geometry,
+            {**baseline_options, 'quality': thumbnails.QUALITY},
+            repeat,
+        )
+        self.stdout.write(
+            f'baseline {geometry} JPEG: {old} B, {old_time * 1000:.1f}ms; '
+            f'at quality {thumbnails.QUALITY}: {baseline} B '
+            f'({(old - baseline) / old:.0%} less), '
+            f'{baseline_time * 1000:.1f}ms'
+        )
+        for geometry, variant_options in thumbnails.VARIANTS:
+            size, dimensions, elapsed = self.encode(
+                geometry, variant_options, repeat,
+            )
+            saved = baseline - size
+            self.stdout.write(
+                f'{dimensions[0]}x{dimensions[1]} '
+                f'{variant_options["format"]}: {size} B, '
+                f'saved {saved} B ({saved / baseline:.0%}) at equal '
+                f'quality, {(old - size) / old:.0%} in all, '
+                f'{elapsed * 1000:.1f}ms'
+            )
+
+    def encode(self, geometry_string, options, repeat):
+        options = thumbnails.normalize_options(ImageFile(self.name), options)
+        timings = []
+        for _ in range(repeat):
+            image = Image.open(BytesIO(self.data))
+            image.load()
+            image_info = default.engine.get_image_info(image)
+            started = time.perf_counter()
+            geometry = parse_geometry(
+                geometry_string,
+                default.engine.get_image_ratio(image, options),
+            )
+            image = default.engine.create(image, geometry, options)
+            raw = default.engine._get_raw_data(
+                image, options['format'], options['quality'], image_info,
+            )
+            timings.append(time.perf_counter() - started)
+        return len(raw), image.size, statistics.median(timings)
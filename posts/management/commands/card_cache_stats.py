@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import cards
+
+
+class Command(BaseCommand):
+    help = 'Показывает число попаданий и промахов кэша карточек постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        hits, misses = cards.stats()
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {hits}, промахов: {misses}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        if options['reset']:
+            cards.reset_stats()
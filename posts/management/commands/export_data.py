@@ -0,0 +1,64 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает записи, комментарии или подписки пользователя либо '
+        'записи группы в JSONL или CSV, не загружая их в память целиком. '
+        'Файл с расширением .gz сжимается по ходу записи.'
+    )
+
+    def add_arguments(self, parser):
+        owner = parser.add_mutually_exclusive_group()
+        owner.add_argument('--user', help='Имя пользователя.')
+        owner.add_argument('--group', help='Slug группы.')
+        parser.add_argument(
+            '--model',
+            choices=list(exporter.MODELS),
+            default='post',
+        )
+        parser.add_argument(
+            '--format',
+            choices=exporter.FORMATS,
+            default='jsonl',
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки или - для стандартного вывода.',
+        )
+
+    def handle(self, *args, **options):
+        kind = options['model']
+        if not options['user'] and not options['group']:
+            raise CommandError('Укажите --user или --group.')
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}.')
+            queryset = exporter.user_queryset(kind, user)
+        else:
+            if kind != 'post':
+                raise CommandError('Из группы выгружаются только записи.')
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError(f'Нет группы {options["group"]}.')
+            queryset = exporter.group_queryset(group)
+        content = exporter.export(kind, queryset, options['format'])
+        output = options['output']
+        if output == '-':
+            for block in content:
+                self.stdout.write(block.decode(), ending='')
+            return
+        opener = gzip.open if output.endswith('.gz') else open
+        size = 0
+        with opener(output, 'wb') as exported:
+            for block in content:
+                exported.write(block)
+                size += len(block)
+        self.stderr.write(f'Выгружено {size} байт в {output}.')
@@ -0,0 +1,159 @@
+import asyncio
+import resource
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from posts import events
+
+# Idle connections mostly sleep; a small stack lets thousands of their
+# threads fit in memory, as they would in a threaded server.
+THREAD_STACK_SIZE = 256 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест потока новых записей. По умолчанию держит '
+        'в процессе тысячи подписчиков и измеряет задержку доставки; '
+        'с --url открывает столько же SSE-соединений к работающему серверу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.1,
+            help='Секунды между публикациями записей.',
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес потока, например http://localhost:8000/events/.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=60,
+            help='Сколько секунд держать соединения открытыми с --url.',
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            asyncio.run(self.hold(
+                options['url'], options['connections'], options['duration'],
+            ))
+        else:
+            self.in_process(
+                options['connections'], options['posts'], options['interval'],
+            )
+
+    def in_process(self, connections, posts, interval):
+        hub = events.Hub()
+        published = []
+        latencies = []
+        lock = threading.Lock()
+
+        def listen(subscription):
+            for chunk in events.Stream(subscription):
+                if 'event: posts' in chunk:
+                    received = time.perf_counter()
+                    with lock:
+                        latencies.append(received - published[-1])
+                        if len(latencies) == connections * posts:
+                            return
+                elif chunk.startswith(': ping'):
+                    return
+
+        threading.stack_size(THREAD_STACK_SIZE)
+        started = time.perf_counter()
+        # Long heartbeats and lifetimes: every listener stays asleep until
+        # a post comes.
+        with override_settings(EVENTS_HEARTBEAT=3600, EVENTS_MAX_AGE=3600):
+            threads = [
+                threading.Thread(
+                    target=listen,
+                    args=(hub.subscribe([events.FEED]),),
+                    daemon=True,
+                )
+                for _ in range(connections)
+            ]
+            for thread in threads:
+                thread.start()
+            connected = time.perf_counter() - started
+            publish_times = []
+            for _ in range(posts):
+                time.sleep(interval)
+                published.append(time.perf_counter())
+                hub.publish([events.FEED])
+                publish_times.append(time.perf_counter() - published[-1])
+            time.sleep(interval)
+        delivered = len(latencies)
+        latencies.sort()
+        memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        self.stdout.write(
+            f'connections={connections} connect={connected * 1000:.0f}ms '
+            f'max_rss={memory}MB'
+        )
+        if not latencies:
+            raise CommandError('Ни одно уведомление не доставлено.')
+        self.stdout.write(
+            f'posts={posts} delivered={delivered}/{connections * posts} '
+            f'publish={statistics.median(publish_times) * 1000:.2f}ms '
+            f'latency p50={statistics.median(latencies) * 1000:.1f}ms '
+            f'p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms '
+            f'max={latencies[-1] * 1000:.1f}ms'
+        )
+
+    async def hold(self, url, connections, duration):
+        parts = urlsplit(url)
+        target = parts.path + (f'?{parts.query}' if parts.query else '')
+        totals = {'failed': 0, 'reopened': 0, 'events': 0, 'pings': 0}
+
+        async def listen():
+            reader, writer = await asyncio.open_connection(
+                parts.hostname, parts.port or 80,
+            )
+            writer.write(
+                f'GET {target} HTTP/1.1\r\n'
+                f'Host: {parts.netloc}\r\n'
+                f'Accept: text/event-stream\r\n\r\n'.encode()
+            )
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        return
+                    if line.startswith(b'event: posts'):
+                        totals['events'] += 1
+                    elif line.startswith(b': ping'):
+                        totals['pings'] += 1
+            finally:
+                writer.close()
+
+        async def connect():
+            # Streams are closed by the server after EVENTS_MAX_AGE and
+            # reopened, as a browser would.
+            try:
+                await listen()
+                while True:
+                    await asyncio.sleep(settings.EVENTS_RETRY)
+                    totals['reopened'] += 1
+                    await listen()
+            except OSError:
+                totals['failed'] += 1
+
+        tasks = [asyncio.ensure_future(connect()) for _ in range(connections)]
+        await asyncio.wait(tasks, timeout=duration)
+        for task in tasks:
+            task.cancel()
+        self.stdout.write(
+            f'connections={connections} failed={totals["failed"]} '
+            f'reopened={totals["reopened"]} events={totals["events"]} '
+            f'pings={totals["pings"]} in {duration:.0f}s'
+        )
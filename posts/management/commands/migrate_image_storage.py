@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import blobs
+from posts.models import Post
+from posts.storage import is_hashed
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки записей из плоского каталога posts/ в '
+        'хранилище с адресацией по содержимому, пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        moved = missing = last_id = 0
+        while True:
+            posts = list(
+                Post.objects
+                .filter(pk__gt=last_id)
+                .exclude(image='')
+                .exclude(image__isnull=True)
+                .order_by('pk')
+                .only('pk', 'image')[:options['batch_size']]
+            )
+            if not posts:
+                break
+            last_id = posts[-1].pk
+            old_names = set()
+            changed = []
+            for post in posts:
+                name = post.image.name
+                if is_hashed(name):
+                    continue
+                if not storage.exists(name):
+                    missing += 1
+                    continue
+                with storage.open(name) as content:
+                    post.image.name = storage.save(name, content)
+                old_names.add(name)
+                changed.append(post)
+            with transaction.atomic():
+                Post.objects.bulk_update(changed, ['image'])
+                for post in changed:
+                    blobs.claim(post.image.name)
+            still_used = set(
+                Post.objects.filter(image__in=old_names)
+                .values_list('image', flat=True)
+            )
+            for name in old_names - still_used:
+                storage.delete(name)
+            moved += len(changed)
+            self.stdout.write(f'Перенесено картинок: {moved}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: перенесено {moved}, не найдено файлов {missing}.'
+        ))
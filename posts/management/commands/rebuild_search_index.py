@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс записей и комментариев, обходя их '
+        'пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        for model, name in ((Post, 'записей'), (Comment, 'комментариев')):
+            indexed = 0
+            for batch in search.rebuild(options['batch_size'], model):
+                indexed += batch
+                self.stdout.write(f'Проиндексировано {name}: {indexed}')
+            self.stdout.write(self.style.SUCCESS(
+                f'Готово: проиндексировано {name} {indexed}.'
+            ))
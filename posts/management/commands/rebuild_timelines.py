@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок всех пользователей с нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=timeline.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        authors = entries = 0
+        with transaction.atomic():
+            for _, inserted in timeline.rebuild(options['batch_size']):
+                authors += 1
+                entries += inserted
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты пересобраны: авторов {authors}, записей {entries}.'
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики записей, подписок и комментариев '
+        'пользователей, счётчики комментариев записей и исправляет '
+        'расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=counters.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        users = fixed = 0
+        for processed, drifted in counters.reconcile(options['batch_size']):
+            users += processed
+            fixed += drifted
+            self.stdout.write(f'Обработано пользователей: {users}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: пользователей {users}, исправлено {fixed}.'
+        ))
+        posts = fixed = 0
+        for processed, drifted in counters.reconcile_comments(
+            options['batch_size'],
+        ):
+            posts += processed
+            fixed += drifted
+            self.stdout.write(f'Обработано записей: {posts}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: записей {posts}, исправлено {fixed}.'
+        ))
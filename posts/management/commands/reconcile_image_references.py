@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки на картинки в хранилище с адресацией по '
+        'содержимому по записям, которые их используют.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=blobs.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        images = fixed = 0
+        for processed, drifted in blobs.reconcile(options['batch_size']):
+            images += processed
+            fixed += drifted
+            self.stdout.write(f'Обработано картинок: {images}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: картинок {images}, исправлено {fixed}.'
+        ))
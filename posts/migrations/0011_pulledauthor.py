@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PulledAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pulled_feed', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='timelineentry',
+            options={'ordering': ('-pub_date', '-post')},
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_feed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_thread_idx'),
+        ),
+    ]
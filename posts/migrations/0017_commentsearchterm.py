@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Comment')),
+            ],
+            options={
+                'unique_together': {('term', 'comment')},
+            },
+        ),
+    ]
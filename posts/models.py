@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -16,6 +18,11 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField('Текст',)
     pub_date = models.DateTimeField(
@@ -37,12 +44,35 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True
     )
+    # Kept up to date by signals, so feeds never count comments.
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -70,6 +100,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_thread_idx',
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -87,3 +123,85 @@ class Follow(models.Model):
         blank=True,
         null=True,
     )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField('date published')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx',
+            ),
+        ]
+
+
+class PulledAuthor(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='pulled_feed',
+    )
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписан', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+
+# A posting of the full-text index: a stemmed term found in a post and
+# the number of its occurrences there.
+class SearchTerm(models.Model):
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        # Also serves as the term -> posts index.
+        unique_together = ('term', 'post')
+
+
+# The same for comments, searched from the admin.
+class CommentSearchTerm(models.Model):
+    term = models.CharField(max_length=64)
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('term', 'comment')
+
+
+# A file of ContentAddressedStorage and the number of posts using it.
+class StoredImage(models.Model):
+    name = models.CharField(max_length=255, primary_key=True)
+    references = models.PositiveIntegerField(default=0)
@@ -0,0 +1,207 @@
+import base64
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from . import background
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+# Number of page links shown on each side of the current page.
+PAGE_WINDOW = 2
+COUNT_KEY = 'count:{}'
+REFRESH_KEY = 'count-refresh:{}'
+REFRESH_LOCK_TIMEOUT = 60
+
+
+def encode_cursor(value, pk, number, backwards=False):
+    payload = json.dumps(
+        [value.isoformat(), pk, number, int(backwards)],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, pk, number, backwards = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        value = parse_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if value is None or not isinstance(pk, int):
+        return None
+    if not isinstance(number, int):
+        return None
+    return value, pk, max(number, 1), bool(backwards)
+
+
+def seek(queryset, after=None, backwards=False, limit=None,
+         field='pub_date', pk='pk'):
+    """Return up to ``limit`` rows of ``queryset`` past the ``after`` key.
+
+    Rows come newest first, or oldest first when walking ``backwards``.
+    """
+    if after is not None:
+        value, key = after
+        op = 'gt' if backwards else 'lt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value})
+            | Q(**{field: value, f'{pk}__{op}': key})
+        )
+    if backwards:
+        queryset = queryset.order_by(field, pk)
+    else:
+        queryset = queryset.order_by(f'-{field}', f'-{pk}')
+    return list(queryset[:limit])
+
+
+class CursorPaginator:
+    """Keyset paginator over a ``(<datetime field>, id)`` ordering.
+
+    Every page is fetched with an index seek past the cursor and one extra
+    row to detect the next page, so neither ``COUNT(*)`` nor ``OFFSET`` is
+    ever issued. Besides querysets, ``object_list`` may be any feed that
+    provides its own ``seek(after, backwards, limit)``.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = field
+
+    def _fetch(self, after=None, backwards=False):
+        limit = self.per_page + 1
+        if hasattr(self.object_list, 'seek'):
+            return self.object_list.seek(after, backwards, limit)
+        return seek(self.object_list, after, backwards, limit, self.field)
+
+    def cursor_for(self, obj, number, backwards=False):
+        return encode_cursor(
+            getattr(obj, self.field), obj.pk, number, backwards
+        )
+
+    def page(self, token=None, paginator=None):
+        cursor = decode_cursor(token) if token else None
+        number = 1
+        has_previous = False
+        if cursor is None:
+            items = self._fetch()
+            has_next = len(items) > self.per_page
+            items = items[:self.per_page]
+        else:
+            value, pk, number, backwards = cursor
+            items = self._fetch((value, pk), backwards)
+            if backwards:
+                if len(items) <= self.per_page:
+                    # Walked back to the head of the feed: serve the
+                    # canonical first page so its token stays stable.
+                    return self.page(paginator=paginator)
+                items = items[:self.per_page][::-1]
+                has_previous = True
+                has_next = True
+            else:
+                has_previous = True
+                has_next = len(items) > self.per_page
+                items = items[:self.per_page]
+        return self._make_page(
+            items, number, has_previous, has_next, paginator
+        )
+
+    def wrap(self, page):
+        # Attach cursors to a page produced by the numbered fallback so
+        # that navigating away from it switches to keyset pagination.
+        items = list(page.object_list)
+        return self._make_page(
+            items, page.number, page.has_previous(), page.has_next(),
+            page.paginator,
+        )
+
+    def _make_page(self, items, number, has_previous, has_next, paginator):
+        if paginator is None:
+            paginator = Paginator(self.object_list, self.per_page)
+        page = Page(items, number, paginator)
+        # Pages are runs of the feed, so their first and last rows tell
+        # what they hold. Unlike the number and the cursors, which come
+        # from the client's token, this can key fragments shared by all
+        # viewers.
+        page.cache_key = (
+            f'{items[0].pk}-{items[-1].pk}' if items else 'empty'
+        )
+        page.previous_cursor = None
+        page.next_cursor = None
+        if items and has_previous:
+            page.previous_cursor = self.cursor_for(
+                items[0], max(number - 1, 1), backwards=True
+            )
+        if items and has_next:
+            page.next_cursor = self.cursor_for(items[-1], number + 1)
+        return page
+
+
+def refresh_count(name, object_list):
+    cache.set(COUNT_KEY.format(name), (object_list.count(), time.time()), None)
+
+
+def _refresh_in_background(name, object_list):
+    try:
+        refresh_count(name, object_list)
+    finally:
+        cache.delete(REFRESH_KEY.format(name))
+
+
+def cached_count(name, object_list):
+    """Return the last known size of ``object_list``, or None.
+
+    The figure is never computed on the request: a missing or stale one
+    is recounted by a background worker once the current transaction
+    commits, and the stale figure is served meanwhile.
+    """
+    found = cache.get(COUNT_KEY.format(name))
+    max_age = settings.FEED_COUNT_MAX_AGE
+    if found is None or found[1] < time.time() - max_age:
+        if cache.add(REFRESH_KEY.format(name), 1, REFRESH_LOCK_TIMEOUT):
+            background.defer(_refresh_in_background, name, object_list)
+    return None if found is None else found[0]
+
+
+def page_window(page, num_pages, size=PAGE_WINDOW):
+    # The count may lag behind the feed, so a page that has a successor
+    # is never taken for the last one.
+    last = max(num_pages, page.number + bool(page.next_cursor))
+    return range(max(page.number - size, 1), min(page.number + size, last) + 1)
+
+
+def paginate(request, object_list, per_page=POSTS_PER_PAGE, count=None):
+    """Return ``(paginator, page)`` for a feed request.
+
+    ``?cursor=`` tokens are served by :class:`CursorPaginator`; legacy
+    ``?page=N`` links fall back to the numbered ``Paginator``. The
+    paginator itself counts lazily, and a known ``count`` (see
+    :func:`cached_count`) is handed to it instead of a ``COUNT(*)``;
+    with one, the page also gets a window of numbered links around it.
+    """
+    paginator = Paginator(object_list, per_page)
+    if count is not None:
+        # Paginator.count is a cached property: seeding it keeps the
+        # COUNT(*) off the request.
+        paginator.count = count
+    cursor_paginator = CursorPaginator(object_list, per_page)
+    page_number = request.GET.get('page')
+    if page_number is not None and 'cursor' not in request.GET:
+        page = cursor_paginator.wrap(paginator.get_page(page_number))
+    else:
+        page = cursor_paginator.page(request.GET.get('cursor'), paginator)
+    page.page_window = None
+    page.last_number = None
+    if count is not None:
+        page.page_window = page_window(page, paginator.num_pages)
+        page.last_number = max(paginator.num_pages, page.page_window[-1])
+    return paginator, page
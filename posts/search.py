@@ -0,0 +1,209 @@
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Q, Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
+
+from .models import Comment, CommentSearchTerm, Post, SearchTerm
+from .paginators import cached_count
+
+BATCH_SIZE = 1000
+MAX_TERM_LENGTH = 64
+WORD = re.compile(r'\w+')
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'да', 'для', 'до', 'же', 'за',
+    'и', 'из', 'или', 'к', 'как', 'ко', 'ли', 'на', 'над', 'не', 'ни',
+    'но', 'о', 'об', 'от', 'по', 'под', 'при', 'про', 'с', 'со', 'так',
+    'то', 'у', 'что', 'это',
+))
+# Indexed models: their postings, the postings' key to them, the name of
+# their cached count and the date found rows are ordered by after rank.
+INDEXES = {
+    Post: (SearchTerm, 'post', 'index', 'pub_date'),
+    Comment: (CommentSearchTerm, 'comment', 'admin:posts.comment', 'created'),
+}
+
+# Snowball stemmer for Russian. Endings are only stripped inside RV, the
+# part of the word after its first vowel.
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+# DERIVATIONAL endings are stripped in R2 only.
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DER = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word):
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    stripped = PERFECTIVE_GERUND.sub('', rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        stripped = ADJECTIVE.sub('', rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub('', stripped, 1)
+        else:
+            stripped = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+    rv = re.sub('и$', '', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DER.sub('', rv, 1)
+    stripped = re.sub('ь$', '', rv, 1)
+    if stripped == rv:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        rv = re.sub('нн$', 'н', rv, 1)
+    else:
+        rv = stripped
+    return start + rv
+
+
+def terms(text):
+    """Return the stemmed terms of ``text`` with their frequencies."""
+    found = Counter()
+    for word in WORD.findall(text.lower().replace('ё', 'е')):
+        if word not in STOP_WORDS:
+            found[stem(word)[:MAX_TERM_LENGTH]] += 1
+    return found
+
+
+def _postings(instance):
+    postings, key, _, _ = INDEXES[type(instance)]
+    return [
+        postings(
+            term=term,
+            weight=min(weight, 32767),
+            **{f'{key}_id': instance.pk},
+        )
+        for term, weight in terms(instance.text).items()
+    ]
+
+
+def index(instance, created=False):
+    """Replace the postings of a post or a comment."""
+    postings, key, _, _ = INDEXES[type(instance)]
+    with transaction.atomic():
+        if not created:
+            postings.objects.filter(**{f'{key}_id': instance.pk}).delete()
+        postings.objects.bulk_create(_postings(instance))
+
+
+def rebuild(batch_size=BATCH_SIZE, model=Post):
+    """Reindex all posts or comments, one batch at a time.
+
+    Every batch replaces its own postings, so search keeps working while
+    the index is rebuilt. Yields the number of indexed rows per batch.
+    """
+    postings, key, _, _ = INDEXES[model]
+    last_id = 0
+    while True:
+        found = list(
+            model.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'text')[:batch_size]
+        )
+        if not found:
+            return
+        last_id = found[-1].pk
+        with transaction.atomic():
+            postings.objects.filter(**{f'{key}__in': found}).delete()
+            postings.objects.bulk_create(
+                [posting for item in found for posting in _postings(item)],
+                batch_size=batch_size,
+            )
+        yield len(found)
+
+
+def _idf(model, query_terms):
+    if not query_terms:
+        return None
+    postings, key, count_name, _ = INDEXES[model]
+    found = dict(
+        postings.objects
+        .filter(term__in=query_terms)
+        .order_by()
+        .values_list('term')
+        .annotate(found=Count(key))
+    )
+    if len(found) < len(query_terms):
+        return None
+    total = max(
+        cached_count(count_name, model.objects.all()) or 0,
+        max(found.values()),
+    )
+    return {
+        term: math.log(1 + total / rows) for term, rows in found.items()
+    }
+
+
+def search(queryset, query, also=None):
+    """Filter ``queryset`` down to the posts matching every query term.
+
+    Posts are annotated with ``search_rank``, the TF-IDF score of their
+    terms, and come best first. Posts matching the ``also`` filter are
+    kept too, ranked last. Comment querysets are searched the same way.
+    """
+    postings, key, _, date = INDEXES[queryset.model]
+    ordering = ('-search_rank', f'-{date}', '-pk')
+    idf = _idf(queryset.model, set(terms(query)))
+    if not idf:
+        queryset = queryset.annotate(
+            search_rank=Value(0, output_field=FloatField()),
+        )
+        if also is None:
+            return queryset.none()
+        return queryset.filter(also).order_by(*ordering[1:])
+    postings = postings.objects.filter(term__in=idf).order_by()
+    matching = (
+        postings
+        .values(key)
+        .annotate(found=Count('term'))
+        .filter(found=len(idf))
+        .values(key)
+    )
+    score = Sum(Case(
+        *[
+            When(term=term, then=ExpressionWrapper(
+                F('weight') * weight, output_field=FloatField(),
+            ))
+            for term, weight in idf.items()
+        ],
+        output_field=FloatField(),
+    ))
+    rank = (
+        postings
+        .filter(**{key: OuterRef('pk')})
+        .values(key)
+        .annotate(rank=score)
+        .values('rank')
+    )
+    found = Q(pk__in=matching)
+    if also is not None:
+        found |= also
+    return queryset.filter(found).annotate(search_rank=Coalesce(
+        Subquery(rank, output_field=FloatField()), Value(0),
+    )).order_by(*ordering)
@@ -0,0 +1,148 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import blobs, caching, counters, search, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump(instance.author_id, _counter(sender), 1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def count_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, _counter(sender), -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_post_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_post_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump(instance.author_id, 'followers_count', 1)
+        counters.bump(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    counters.bump(instance.author_id, 'followers_count', -1)
+    counters.bump(instance.user_id, 'following_count', -1)
+
+
+def _counter(sender):
+    return 'posts_count' if sender is Post else 'comments_count'
+
+
+# Cache versions are bumped here rather than in views, so that writes
+# from the admin or the shell change the pages they show up on too.
+@receiver(post_save, sender=Post)
+def bump_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_group = None
+    if instance._stored_group_id not in (None, instance.group_id):
+        old_group = Group.objects.filter(pk=instance._stored_group_id).first()
+    caching.bump_post(instance, old_group)
+
+
+@receiver(post_delete, sender=Post)
+def bump_deleted_post_pages(sender, instance, **kwargs):
+    caching.bump_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump(caching.post_ns(instance.post_id), caching.COMMENTS)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump(
+            caching.author_ns(instance.user.username),
+            caching.author_ns(instance.author.username),
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_pages(sender, instance, raw=False, **kwargs):
+    # Group titles are shown on cards all over the site, and changes are
+    # rare: every page is refreshed.
+    if not raw:
+        caching.bump(caching.SITE)
+
+
+@receiver(post_save, sender=Post)
+def push_post_to_timelines(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.user_id and instance.author_id:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    if instance.user_id and instance.author_id:
+        timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_text(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        search.index(instance, created)
+
+
+@receiver(pre_save, sender=Post)
+def remember_stored(sender, instance, raw=False, **kwargs):
+    instance._stored_image = ''
+    instance._stored_group_id = None
+    if instance.pk and not raw:
+        stored = Post.objects.filter(
+            pk=instance.pk,
+        ).values_list('image', 'group_id').first()
+        if stored is not None:
+            instance._stored_image = stored[0] or ''
+            instance._stored_group_id = stored[1]
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Also for an unchanged name, where the two cancel out: the same file
+    # uploaded again has already been referenced by the storage.
+    blobs.claim(instance.image.name or '')
+    blobs.release(instance._stored_image)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    blobs.release(instance.image.name)
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores files under the SHA-256 of their content.
+
+    ``posts/photo.jpg`` becomes ``posts/ab/cd/abcd....jpg``: two levels of
+    subdirectories keep every directory small, and a file uploaded again
+    is not written twice. Whether a stored file is still in use is
+    tracked by :mod:`posts.blobs`.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension,
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        # Imported here: blobs needs the models, which need this module.
+        from .blobs import take
+        take(name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME.search(name))
@@ -0,0 +1,25 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import cards, thumbnails
+
+from .viewer_tags import DEFERRED, resolve
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, group_page=False):
+    output = ''.join(cards.render_cards(list(posts), group_page))
+    if context.get(DEFERRED):
+        return mark_safe(output)
+    return resolve(output, context.get('user'))
+
+
+@register.simple_tag
+def post_thumbnail(post):
+    # Thumbnails are made by a background worker; until one is ready the
+    # card shows the original rather than resizing it on the request.
+    if not hasattr(post, 'thumbnail'):
+        thumbnails.attach([post])
+    return post.thumbnail
@@ -0,0 +1,95 @@
+import re
+
+from django import template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+DEFERRED = 'viewer_deferred'
+BLOCK = re.compile(
+    r'<!--viewer:if:(?P<condition>\w+(?::\d+)?)-->(?P<then>.*?)'
+    r'<!--viewer:else-->(?P<otherwise>.*?)<!--viewer:end-->',
+    re.DOTALL,
+)
+
+
+def _matches(condition, user):
+    if condition == 'authenticated':
+        return user.is_authenticated
+    _, user_id = condition.split(':')
+    return user.is_authenticated and user.pk == int(user_id)
+
+
+def resolve(output, user):
+    return mark_safe(BLOCK.sub(
+        lambda match: match.group(
+            'then' if _matches(match.group('condition'), user)
+            else 'otherwise'
+        ),
+        output,
+    ))
+
+
+class PersonalizeNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        with context.push(**{DEFERRED: True}):
+            output = self.nodelist.render(context)
+        return resolve(output, context.get('user'))
+
+
+class ViewerNode(template.Node):
+    def __init__(self, condition, user_id, then, otherwise):
+        self.condition = condition
+        self.user_id = user_id
+        self.then = then
+        self.otherwise = otherwise
+
+    def render(self, context):
+        condition = self.condition
+        if self.user_id is not None:
+            condition = f'{condition}:{self.user_id.resolve(context)}'
+        if not context.get(DEFERRED):
+            if _matches(condition, context.get('user')):
+                return self.then.render(context)
+            return self.otherwise.render(context)
+        return (
+            f'<!--viewer:if:{condition}-->{self.then.render(context)}'
+            f'<!--viewer:else-->{self.otherwise.render(context)}'
+            f'<!--viewer:end-->'
+        )
+
+
+@register.tag
+def personalize(parser, token):
+    """Fill in the per-viewer parts of a possibly cached fragment.
+
+    ``{% ifviewer %}`` blocks rendered inside are emitted with both
+    branches, so the enclosed ``{% cache %}`` entries are shared by all
+    viewers, and are resolved for the current user on every request.
+    """
+    nodelist = parser.parse(('endpersonalize',))
+    parser.delete_first_token()
+    return PersonalizeNode(nodelist)
+
+
+@register.tag
+def ifviewer(parser, token):
+    """``{% ifviewer authenticated %}`` or ``{% ifviewer user <id> %}``."""
+    bits = token.split_contents()
+    if len(bits) == 2 and bits[1] == 'authenticated':
+        condition, user_id = 'authenticated', None
+    elif len(bits) == 3 and bits[1] == 'user':
+        condition, user_id = 'user', parser.compile_filter(bits[2])
+    else:
+        raise template.TemplateSyntaxError(
+            "'ifviewer' expects 'authenticated' or 'user <id>'"
+        )
+    then = parser.parse(('else', 'endifviewer'))
+    otherwise = template.NodeList()
+    if parser.next_token().contents == 'else':
+        otherwise = parser.parse(('endifviewer',))
+        parser.delete_first_token()
+    return ViewerNode(condition, user_id, then, otherwise)
@@ -0,0 +1,102 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+USERNAME3 = 'Ivan'
+ROWS_COUNT = 5
+CHANGELISTS = [
+    reverse(f'admin:posts_{model}_changelist')
+    for model in ('post', 'comment', 'follow')
+]
+ADMIN_POSTS, ADMIN_COMMENTS, ADMIN_FOLLOWS = CHANGELISTS
+ADMIN_USERS = reverse('admin:auth_user_changelist')
+ADD_POST = reverse('admin:posts_post_add')
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_superuser(
+            username=USERNAME1, email='oleg@example.com', password='pass',
+        )
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.ivan_user = User.objects.create_user(username=USERNAME3)
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='slug',
+        )
+        Follow.objects.create(user=cls.ivan_user, author=cls.oleg_user)
+        Follow.objects.create(user=cls.ivan_user, author=cls.olegson_user)
+        for author in (cls.oleg_user, cls.olegson_user, cls.ivan_user):
+            for i in range(ROWS_COUNT):
+                post = Post.objects.create(
+                    text=f'Пост {i}', author=author, group=cls.group,
+                )
+                Comment.objects.create(
+                    post=post, author=author, text=f'Комментарий {i}',
+                )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.oleg_user)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        # Session and user lookups, the capped count and the page itself.
+        for url in CHANGELISTS:
+            with self.subTest(url=url):
+                self.admin_client.get(url)
+                with self.assertNumQueries(4):
+                    self.admin_client.get(url)
+
+    def test_changelist_count_is_capped(self):
+        response = self.admin_client.get(ADMIN_POSTS, {'author__id__exact': 1})
+        self.assertIsNone(response.context['cl'].full_result_count)
+        self.assertEqual(response.context['cl'].result_count, ROWS_COUNT)
+
+    def test_username_search(self):
+        cases = {
+            ADMIN_POSTS: ('Olegs', ROWS_COUNT),
+            ADMIN_COMMENTS: ('Oleg', 2 * ROWS_COUNT),
+            ADMIN_FOLLOWS: ('Iv', 2),
+            ADMIN_USERS: ('Ol', 2),
+        }
+        for url, (term, expected) in cases.items():
+            with self.subTest(url=url):
+                response = self.admin_client.get(url, {'q': term})
+                self.assertEqual(
+                    len(response.context['cl'].result_list), expected
+                )
+
+    def test_comment_text_search(self):
+        response = self.admin_client.get(
+            ADMIN_COMMENTS, {'q': 'комментарии 3'},
+        )
+        found = response.context['cl'].result_list
+        self.assertEqual(len(found), 3)
+        self.assertEqual({comment.text for comment in found}, {
+            'Комментарий 3',
+        })
+
+    def test_foreign_keys_are_autocompleted(self):
+        response = self.admin_client.get(ADD_POST)
+        self.assertContains(response, 'data-ajax--url', count=2)
+        self.assertNotContains(response, f'>{USERNAME3}</option>')
+
+    @override_settings(POST_IMAGE_MAX_SIZE=2 ** 20)
+    def test_oversized_upload_is_rejected(self):
+        posts = Post.objects.count()
+        response = self.admin_client.post(ADD_POST, {
+            'text': 'Текст',
+            'author': self.oleg_user.pk,
+            'image': SimpleUploadedFile(
+                'photo.jpg', bytes(2 ** 21), 'image/jpeg',
+            ),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['adminform'].form.errors['image'],
+            ['Файл изображения больше 1 МБ.'],
+        )
+        self.assertEqual(Post.objects.count(), posts)
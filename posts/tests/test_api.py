@@ -0,0 +1,184 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+SLUG = 'slug'
+API_INDEX = reverse('api_index')
+API_FOLLOW = reverse('api_follow_index')
+API_GROUP = reverse('api_group', args=[SLUG])
+API_PROFILE = reverse('api_profile', args=[USERNAME1])
+API_USER = reverse('api_user', args=[USERNAME1])
+API_FOLLOW_STATE = reverse('api_follow_state', args=[USERNAME1])
+API_BATCH = reverse('api_batch')
+POSTS_COUNT = 13
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        Follow.objects.create(user=cls.olegson_user, author=cls.oleg_user)
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.oleg_user, group=cls.group,
+            )
+            for i in range(POSTS_COUNT)
+        ]
+        Comment.objects.create(
+            post=cls.posts[-1], author=cls.olegson_user, text='Комментарий',
+        )
+        cls.guest_client = Client()
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, client, url, **params):
+        ids = []
+        while url:
+            response = client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [item['id'] for item in data['results']]
+            url, params = data['next'], {}
+        return ids
+
+    def test_feeds_page_through_every_post(self):
+        expected = [post.pk for post in reversed(self.posts)]
+        for client, url in (
+            (self.guest_client, API_INDEX),
+            (self.guest_client, API_GROUP),
+            (self.guest_client, API_PROFILE),
+            (self.olegson_client, API_FOLLOW),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.walk(client, url, limit=5, fields='id'), expected,
+                )
+
+    def test_sparse_fieldsets(self):
+        response = self.guest_client.get(
+            API_INDEX, {'fields': 'id,text,author,comments_count'},
+        )
+        self.assertEqual(response.json()['results'][0], {
+            'id': self.posts[-1].pk,
+            'text': self.posts[-1].text,
+            'author': USERNAME1,
+            'comments_count': 1,
+        })
+        item = self.guest_client.get(API_INDEX).json()['results'][0]
+        self.assertEqual(item['group'], SLUG)
+        self.assertIsNone(item['image'])
+        self.assertIn('pub_date', item)
+
+    def test_page_costs_one_query(self):
+        with self.assertNumQueries(1):
+            self.guest_client.get(API_INDEX, {'fields': 'id,author'})
+
+    def test_bad_requests(self):
+        for params, status in (
+            ({'fields': 'id,password'}, 400),
+            ({'limit': 'all'}, 400),
+            ({'cursor': 'garbage'}, 400),
+        ):
+            with self.subTest(params=params):
+                response = self.guest_client.get(API_INDEX, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+        self.assertEqual(self.guest_client.get(API_FOLLOW).status_code, 401)
+        self.assertEqual(
+            self.guest_client.get(
+                reverse('api_group', args=['missing'])
+            ).status_code,
+            404,
+        )
+
+
+class BatchApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(
+            username=USERNAME1, first_name='Олег',
+        )
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        Follow.objects.create(user=cls.olegson_user, author=cls.oleg_user)
+        cls.post = Post.objects.create(text='Пост', author=cls.oleg_user)
+        Comment.objects.create(
+            post=cls.post, author=cls.olegson_user, text='Комментарий',
+        )
+        cls.API_POST = reverse('api_post', args=[cls.post.pk])
+        cls.API_COMMENTS = reverse('api_post_comments', args=[cls.post.pk])
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def batch(self, requests):
+        return self.olegson_client.post(
+            API_BATCH,
+            json.dumps({'requests': requests}),
+            content_type='application/json',
+        )
+
+    def test_batch_answers_every_sub_request(self):
+        response = self.batch([
+            {'id': 'user', 'url': API_USER},
+            {'id': 'feed', 'url': f'{API_PROFILE}?fields=id,text'},
+            {'id': 'follow', 'url': API_FOLLOW_STATE},
+            {'id': 'post', 'url': f'{self.API_POST}?fields=id,author'},
+            {'id': 'comments', 'url': f'{self.API_COMMENTS}?fields=text'},
+            {'id': 'missing', 'url': '/api/nowhere/'},
+            {'id': 'html', 'url': reverse('index')},
+        ])
+        self.assertEqual(response.status_code, 200)
+        answers = {
+            answer['id']: answer for answer in response.json()['responses']
+        }
+        self.assertEqual(answers['user']['body']['full_name'], 'Олег')
+        self.assertEqual(answers['user']['body']['followers_count'], 1)
+        self.assertEqual(
+            answers['feed']['body']['results'],
+            [{'id': self.post.pk, 'text': 'Пост'}],
+        )
+        self.assertEqual(answers['follow']['body'], {'following': True})
+        self.assertEqual(
+            answers['post']['body'],
+            {'id': self.post.pk, 'author': USERNAME1},
+        )
+        self.assertEqual(
+            answers['comments']['body']['results'],
+            [{'text': 'Комментарий'}],
+        )
+        self.assertEqual(answers['missing']['status'], 404)
+        self.assertEqual(answers['html']['status'], 404)
+
+    def test_sub_requests_share_lookups(self):
+        urls = [API_USER, API_PROFILE, API_FOLLOW_STATE]
+        # Session and user of the batch, the author, the feed page and
+        # the follow state: the author is looked up once for all three.
+        with self.assertNumQueries(5):
+            response = self.batch(
+                [{'id': url, 'url': url} for url in urls]
+            )
+        self.assertEqual(
+            [answer['status'] for answer in response.json()['responses']],
+            [200, 200, 200],
+        )
+
+    def test_malformed_batch(self):
+        for body in ('[]', '{"requests": 1}', 'nonsense'):
+            with self.subTest(body=body):
+                response = self.olegson_client.post(
+                    API_BATCH, body, content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.olegson_client.get(API_BATCH).status_code, 405)
@@ -0,0 +1,236 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import cards, caching
+from posts.models import Group, Post, User
+
+USERNAME = 'Oleg'
+SLUG1 = 'slug'
+SLUG2 = 'slug2'
+INDEX = reverse('index')
+NEW = reverse('new_post')
+GROUP1 = reverse('group', args=[SLUG1])
+GROUP2 = reverse('group', args=[SLUG2])
+PROFILE = reverse('profile', args=[USERNAME])
+THUMBNAIL_KEY = 'sorl-thumbnail||image||test'
+
+
+class NamespaceInvalidationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+        cls.group1 = Group.objects.create(
+            title='Группа 1', description='Описание', slug=SLUG1,
+        )
+        cls.group2 = Group.objects.create(
+            title='Группа 2', description='Описание', slug=SLUG2,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Старый текст', author=self.user, group=self.group1,
+        )
+
+    def test_new_post_keeps_unrelated_keys(self):
+        cache.set(THUMBNAIL_KEY, 'thumbnail')
+        group2_version = caching.version(caching.group_ns(SLUG2))
+        self.author_client.post(
+            NEW, {'text': 'Новый пост', 'group': self.group1.pk}
+        )
+        self.assertEqual(cache.get(THUMBNAIL_KEY), 'thumbnail')
+        self.assertEqual(
+            caching.version(caching.group_ns(SLUG2)),
+            group2_version,
+        )
+
+    def test_new_post_refreshes_cached_feeds(self):
+        self.author_client.get(INDEX)
+        self.author_client.get(GROUP1)
+        self.author_client.post(
+            NEW, {'text': 'Новый пост', 'group': self.group1.pk}
+        )
+        self.assertContains(self.author_client.get(INDEX), 'Новый пост')
+        self.assertContains(self.author_client.get(GROUP1), 'Новый пост')
+
+    def test_edit_bumps_old_and_new_group(self):
+        self.author_client.get(GROUP1)
+        self.author_client.get(GROUP2)
+        edit = reverse('post_edit', args=[USERNAME, self.post.pk])
+        self.author_client.post(
+            edit, {'text': 'Новый текст', 'group': self.group2.pk}
+        )
+        self.assertNotContains(self.author_client.get(GROUP1), 'Новый текст')
+        self.assertNotContains(self.author_client.get(GROUP1), 'Старый текст')
+        self.assertContains(self.author_client.get(GROUP2), 'Новый текст')
+
+    def test_version_survives_eviction(self):
+        old = caching.version(caching.FEED)
+        cache.delete(caching.KEY.format(caching.FEED))
+        self.assertNotEqual(caching.version(caching.FEED), old)
+
+
+class SharedFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='Старый текст', author=self.user)
+        self.EDIT = reverse('post_edit', args=[USERNAME, self.post.pk])
+
+    def test_index_fragment_is_shared_between_viewers(self):
+        response = self.author_client.get(INDEX)
+        self.assertContains(response, self.EDIT)
+        self.assertContains(response, 'Добавить комментарий (0)')
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        response = self.guest_client.get(INDEX)
+        self.assertContains(response, 'Старый текст')
+        self.assertContains(response, 'К посту')
+        self.assertNotContains(response, self.EDIT)
+        self.assertNotContains(response, 'Добавить комментарий')
+        self.assertNotContains(response, '<!--viewer:')
+
+
+class CardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+            for i in range(3)
+        ]
+
+    def render(self):
+        posts = list(Post.objects.for_feed())
+        with self.assertNumQueries(0):
+            return cards.render_cards(posts)
+
+    def test_cards_are_fetched_with_one_get_many(self):
+        self.render()
+        self.assertEqual(cards.stats(), (0, 3))
+        with mock.patch.object(
+            cards.cache, 'get_many', wraps=cards.cache.get_many
+        ) as get_many:
+            self.render()
+        get_many.assert_called_once()
+        self.assertEqual(cards.stats(), (3, 3))
+
+    def test_edited_post_gets_new_card(self):
+        self.render()
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Новый текст')
+        rendered = self.render()
+        self.assertEqual(cards.stats(), (2, 4))
+        self.assertIn('Новый текст', rendered[-1])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='Текст', author=self.user)
+        self.POST = reverse('post', args=[USERNAME, self.post.pk])
+        self.ADD_COMMENT = reverse(
+            'add_comment', args=[USERNAME, self.post.pk]
+        )
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_get_not_modified(self):
+        for client in (self.guest_client, self.author_client):
+            for url in (INDEX, PROFILE, self.POST):
+                with self.subTest(url=url):
+                    response = client.get(url)
+                    self.assertTrue(response.has_header('Last-Modified'))
+                    response = self.revalidate(client, url, response)
+                    self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_validators(self):
+        index = self.author_client.get(INDEX)
+        post = self.author_client.get(self.POST)
+        self.author_client.post(self.ADD_COMMENT, {'text': 'Комментарий'})
+        for url, response in ((INDEX, index), (self.POST, post)):
+            with self.subTest(url=url):
+                response = self.revalidate(self.author_client, url, response)
+                self.assertEqual(response.status_code, 200)
+        guest_index = self.guest_client.get(INDEX)
+        self.author_client.post(NEW, {'text': 'Новый пост'})
+        response = self.revalidate(self.guest_client, INDEX, guest_index)
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_outside_views_change_validators(self):
+        group = Group.objects.create(title='Группа', slug=SLUG1)
+        comment = self.post.comments.create(author=self.user, text='Текст')
+        writes = {
+            'post': Post.objects.get(pk=self.post.pk).save,
+            'group': group.save,
+            'comment': comment.delete,
+            'deleted post': self.post.delete,
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                response = self.author_client.get(INDEX)
+                write()
+                response = self.revalidate(
+                    self.author_client, INDEX, response,
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_cache_control(self):
+        response = self.guest_client.get(INDEX)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        response = self.author_client.get(INDEX)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_validators_differ_between_viewers(self):
+        self.assertNotEqual(
+            self.guest_client.get(INDEX)['ETag'],
+            self.author_client.get(INDEX)['ETag'],
+        )
+
+    def test_new_comment_refreshes_counts_with_validators(self):
+        for url in (INDEX, PROFILE):
+            with self.subTest(url=url):
+                self.author_client.get(url)
+                self.author_client.post(
+                    self.ADD_COMMENT, {'text': 'Комментарий'},
+                )
+                response = self.author_client.get(url)
+                count = self.post.comments.count()
+                self.assertContains(
+                    response, f'Добавить комментарий ({count})',
+                )
+                response = self.revalidate(self.author_client, url, response)
+                self.assertEqual(response.status_code, 304)
+
+    def test_public_pages_set_no_cookies(self):
+        for url in (INDEX, PROFILE, self.POST):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertEqual(response.cookies, {})
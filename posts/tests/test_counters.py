@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+OLEG_PROFILE = reverse('profile', args=[USERNAME1])
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        self.post = Post.objects.create(text='Пост', author=self.oleg_user)
+        self.follow = Follow.objects.create(
+            user=self.olegson_user,
+            author=self.oleg_user,
+        )
+        self.comment = Comment.objects.create(
+            post=self.post,
+            author=self.olegson_user,
+            text='Комментарий',
+        )
+
+    def stats(self, user):
+        return UserStats.objects.values(
+            'posts_count',
+            'followers_count',
+            'following_count',
+            'comments_count',
+        ).get(user=user)
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(self.stats(self.oleg_user), {
+            'posts_count': 1,
+            'followers_count': 1,
+            'following_count': 0,
+            'comments_count': 0,
+        })
+        self.assertEqual(self.stats(self.olegson_user), {
+            'posts_count': 0,
+            'followers_count': 0,
+            'following_count': 1,
+            'comments_count': 1,
+        })
+        self.follow.delete()
+        self.post.delete()
+        self.assertEqual(self.stats(self.oleg_user)['posts_count'], 0)
+        self.assertEqual(self.stats(self.oleg_user)['followers_count'], 0)
+        self.assertEqual(self.stats(self.olegson_user), {
+            'posts_count': 0,
+            'followers_count': 0,
+            'following_count': 0,
+            'comments_count': 0,
+        })
+
+    def test_profile_card_reads_stored_counters(self):
+        UserStats.objects.filter(user=self.oleg_user).update(posts_count=42)
+        response = self.guest_client.get(OLEG_PROFILE)
+        self.assertContains(response, 'Записей: 42')
+
+    def test_missing_counters_are_computed_on_read(self):
+        UserStats.objects.all().delete()
+        response = self.guest_client.get(OLEG_PROFILE)
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertEqual(self.stats(self.oleg_user)['posts_count'], 1)
+
+    def test_reconcile_command(self):
+        UserStats.objects.filter(user=self.oleg_user).update(
+            posts_count=10,
+            followers_count=0,
+        )
+        UserStats.objects.filter(user=self.olegson_user).delete()
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(self.oleg_user)['posts_count'], 1)
+        self.assertEqual(self.stats(self.oleg_user)['followers_count'], 1)
+        self.assertEqual(self.stats(self.olegson_user)['comments_count'], 1)
+
+
+class PostCommentsCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(
+            User.objects.create_user(username=USERNAME2)
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(text='Пост', author=self.oleg_user)
+        self.ADD_COMMENT = reverse(
+            'add_comment', args=[USERNAME1, self.post.pk]
+        )
+
+    def comments_count(self):
+        self.post.refresh_from_db(fields=['comments_count'])
+        return self.post.comments_count
+
+    def test_counter_follows_comments(self):
+        self.olegson_client.post(self.ADD_COMMENT, {'text': 'Первый'})
+        self.olegson_client.post(self.ADD_COMMENT, {'text': 'Второй'})
+        self.assertEqual(self.comments_count(), 2)
+        self.post.comments.first().delete()
+        self.assertEqual(self.comments_count(), 1)
+
+    def test_reconcile_command(self):
+        Comment.objects.create(
+            post=self.post, author=self.oleg_user, text='Комментарий',
+        )
+        empty_post = Post.objects.create(text='Пост', author=self.oleg_user)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=7)
+        Post.objects.filter(pk=empty_post.pk).update(comments_count=3)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.comments_count(), 1)
+        empty_post.refresh_from_db()
+        self.assertEqual(empty_post.comments_count, 0)
@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import events
+from posts.models import Follow, Group, Post, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+SLUG = 'slug'
+EVENTS = reverse('new_posts_events')
+NEW = reverse('new_post')
+
+
+class HubTests(TestCase):
+    def setUp(self):
+        self.hub = events.Hub()
+
+    def test_post_is_counted_once_per_subscriber(self):
+        everything = self.hub.subscribe([events.FEED, 'group:1'])
+        group = self.hub.subscribe(['group:1'])
+        other = self.hub.subscribe(['group:2'])
+        for _ in range(2):
+            self.assertEqual(self.hub.publish([events.FEED, 'group:1']), 2)
+        self.assertEqual(
+            everything.wait(0), (2, {events.FEED: 2, 'group:1': 2}),
+        )
+        self.assertEqual(group.wait(0), (2, {'group:1': 2}))
+        self.assertEqual(other.wait(0), (0, {'group:2': 0}))
+        self.assertEqual(everything.wait(0)[0], 0)
+
+    def test_reconnecting_subscriber_counts_missed_posts(self):
+        first = self.hub.subscribe(['author:1', 'author:2'])
+        self.hub.publish([events.FEED, 'author:1'])
+        _, seen = first.wait(0)
+        first.close()
+        for topics in (['author:1'], ['author:2'], ['author:3']):
+            self.hub.publish([events.FEED, *topics])
+        again = self.hub.subscribe(['author:1', 'author:3'], seen)
+        self.assertEqual(again.wait(0), (1, {'author:1': 2, 'author:3': 1}))
+        self.assertEqual(
+            events.decode_positions(events.encode_positions(seen)), seen,
+        )
+
+    def test_closed_subscription_is_forgotten(self):
+        subscription = self.hub.subscribe([events.FEED])
+        self.assertEqual(self.hub.count(), 1)
+        subscription.close()
+        self.assertEqual(self.hub.count(), 0)
+        self.assertEqual(self.hub.subscribers, {})
+        self.assertEqual(self.hub.publish([events.FEED]), 0)
+
+
+@override_settings(EVENTS_HEARTBEAT=0.01)
+class NewPostsEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        Follow.objects.create(user=cls.olegson_user, author=cls.oleg_user)
+        cls.oleg_client = Client()
+        cls.oleg_client.force_login(cls.oleg_user)
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def open(self, client, last_event_id=None, **params):
+        headers = {}
+        if last_event_id is not None:
+            headers['HTTP_LAST_EVENT_ID'] = last_event_id
+        response = client.get(EVENTS, params, **headers)
+        self.addCleanup(response.close)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry: '))
+        return response, stream
+
+    def test_new_post_is_pushed_to_matching_feeds(self):
+        streams = {
+            feed: self.open(self.olegson_client, **params)[1]
+            for feed, params in (
+                ('index', {}),
+                ('group', {'feed': 'group', 'slug': SLUG}),
+                ('follow', {'feed': 'follow'}),
+            )
+        }
+        with mock.patch(
+            'posts.events.transaction.on_commit', lambda publish: publish(),
+        ):
+            self.oleg_client.post(
+                NEW, {'text': 'Новый пост', 'group': self.group.pk},
+            )
+        for feed, stream in streams.items():
+            with self.subTest(feed=feed):
+                # Published by another thread: the first id and pings may
+                # come first.
+                for _ in range(500):
+                    chunk = next(stream)
+                    if b'event: ' in chunk:
+                        break
+                self.assertEqual(
+                    chunk.split(b'\n', 1)[1],
+                    b'event: posts\ndata: {"count": 1}\n\n',
+                )
+
+    def test_idle_stream_is_kept_alive_and_closed(self):
+        subscribers = events.hub.count()
+        response, stream = self.open(self.olegson_client, feed='follow')
+        self.assertEqual(events.hub.count(), subscribers + 1)
+        self.assertTrue(next(stream).startswith(b'id: '))
+        self.assertEqual(next(stream), b': ping\n\n')
+        other_author = Post(author=self.olegson_user, text='Пост')
+        events.hub.publish(events.post_topics(other_author))
+        self.assertEqual(next(stream), b': ping\n\n')
+        response.close()
+        self.assertEqual(events.hub.count(), subscribers)
+
+    @override_settings(EVENTS_MAX_AGE=0.05)
+    def test_stream_ends_after_max_age(self):
+        subscribers = events.hub.count()
+        response, stream = self.open(self.olegson_client)
+        self.assertTrue(next(stream).startswith(b'id: '))
+        self.assertEqual(set(stream), {b': ping\n\n'})
+        response.close()
+        self.assertEqual(events.hub.count(), subscribers)
+
+    def test_posts_missed_between_streams_are_counted(self):
+        _, stream = self.open(self.olegson_client, feed='follow')
+        last_event_id = next(stream).decode()[len('id: '):].strip()
+        for _ in range(2):
+            events.hub.publish(events.post_topics(
+                Post(author=self.oleg_user, text='Пост'),
+            ))
+        _, stream = self.open(
+            self.olegson_client, last_event_id, feed='follow',
+        )
+        self.assertEqual(
+            next(stream).split(b'\n', 1)[1],
+            b'event: posts\ndata: {"count": 2}\n\n',
+        )
+
+    def test_follow_feed_needs_login(self):
+        response = Client().get(EVENTS, {'feed': 'follow'})
+        self.assertEqual(response.status_code, 403)
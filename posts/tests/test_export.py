@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+SLUG = 'slug'
+EXPORT_POSTS = reverse('export_user', args=[USERNAME1, 'post'])
+EXPORT_FOLLOWS = reverse('export_user', args=[USERNAME2, 'follow'])
+EXPORT_GROUP = reverse('export_group', args=[SLUG])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.oleg_user, group=cls.group,
+            )
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.olegson_user, text='Комментарий',
+        )
+        Follow.objects.create(user=cls.olegson_user, author=cls.oleg_user)
+        cls.oleg_client = Client()
+        cls.oleg_client.force_login(cls.oleg_user)
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_user_exports_own_data_as_jsonl(self):
+        response = self.oleg_client.get(EXPORT_POSTS)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="{USERNAME1}-posts.jsonl"',
+        )
+        records = [
+            json.loads(line)
+            for line in self.content(response).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(record['id'], record['text'], record['author'], record['group'])
+             for record in records],
+            [(post.pk, post.text, USERNAME1, SLUG) for post in self.posts],
+        )
+        response = self.olegson_client.get(EXPORT_FOLLOWS)
+        self.assertEqual(
+            json.loads(self.content(response)),
+            {'user': USERNAME2, 'author': USERNAME1},
+        )
+
+    def test_others_cannot_export_user_data(self):
+        response = self.olegson_client.get(EXPORT_POSTS)
+        self.assertEqual(response.status_code, 403)
+        self.assertRedirects(
+            Client().get(EXPORT_POSTS),
+            f'{reverse("login")}?next={EXPORT_POSTS}',
+        )
+
+    def test_group_export_is_gzipped_on_the_fly(self):
+        plain = self.content(Client().get(EXPORT_GROUP, {'format': 'csv'}))
+        response = Client().get(
+            EXPORT_GROUP, {'format': 'csv'}, HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(self.content(response)), plain)
+        lines = plain.decode().splitlines()
+        self.assertEqual(lines[0], 'id,text,author,group,pub_date,image')
+        self.assertEqual(len(lines), 4)
+
+    def test_command_export_can_be_imported_back(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'posts.jsonl.gz')
+        call_command(
+            'export_data', user=USERNAME1, output=path, stderr=StringIO(),
+        )
+        with gzip.open(path, 'rt', encoding='utf-8') as exported:
+            plain = os.path.join(directory, 'posts.jsonl')
+            with open(plain, 'w', encoding='utf-8') as copy:
+                copy.write(exported.read())
+        dates = {post.pk: post.pub_date for post in self.posts}
+        Post.objects.all().delete()
+        call_command(
+            'import_data', plain, model='post', skip_rebuild=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'pub_date')), dates,
+        )
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, StoredImage, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+SLUG = 'slug'
+PUB_DATE = '2020-10-25T01:55:00+00:00'
+IMAGE = f'posts/ab/cd/{"abcd" * 16}.jpg'
+
+
+class ImportDataTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as data:
+            data.write(content)
+        return path
+
+    def write_jsonl(self, name, records):
+        return self.write(
+            name, ''.join(json.dumps(record) + '\n' for record in records),
+        )
+
+    def load(self, path, model, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_data', path, model=model, stdout=stdout, stderr=stderr,
+            **options,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_every_model_with_foreign_keys_by_name(self):
+        self.load(self.write(
+            'users.csv',
+            'username,email\n'
+            f'{USERNAME1},oleg@example.com\n'
+            f'{USERNAME2},\n',
+        ), 'user')
+        self.load(self.write_jsonl('groups.jsonl', [
+            {'slug': SLUG, 'title': 'Группа'},
+        ]), 'group')
+        self.load(self.write_jsonl('posts.jsonl', [
+            {'id': 10, 'text': 'Первый', 'author': USERNAME1,
+             'group': SLUG, 'pub_date': PUB_DATE},
+            {'id': 11, 'text': 'Второй', 'author': USERNAME2},
+        ]), 'post', batch_size=1)
+        self.load(self.write_jsonl('comments.jsonl', [
+            {'post': 10, 'author': USERNAME2, 'text': 'Комментарий'},
+        ]), 'comment')
+        self.load(self.write_jsonl('follows.jsonl', [
+            {'user': USERNAME2, 'author': USERNAME1},
+            {'user': USERNAME2, 'author': USERNAME1},
+        ]), 'follow')
+        oleg = User.objects.get(username=USERNAME1)
+        olegson = User.objects.get(username=USERNAME2)
+        self.assertEqual(oleg.email, 'oleg@example.com')
+        self.assertFalse(oleg.has_usable_password())
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.author, oleg)
+        self.assertEqual(post.group, Group.objects.get(slug=SLUG))
+        self.assertEqual(
+            post.pub_date, datetime(2020, 10, 25, 1, 55, tzinfo=timezone.utc),
+        )
+        self.assertEqual(Post.objects.get(pk=11).group, None)
+        self.assertEqual(Comment.objects.get().author, olegson)
+        self.assertEqual(
+            list(Follow.objects.values_list('user', 'author')),
+            [(olegson.pk, oleg.pk)],
+        )
+        # Counters, timelines and the index are rebuilt afterwards.
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(oleg.stats.posts_count, 1)
+        self.assertEqual(olegson.timeline.get().post, post)
+        self.assertTrue(post.search_terms.exists())
+
+    def test_bad_records_are_skipped_and_reported(self):
+        User.objects.create_user(username=USERNAME1)
+        output, errors = self.load(self.write_jsonl('posts.jsonl', [
+            {'text': 'Пост', 'author': USERNAME1},
+            {'text': 'Чужой', 'author': 'nobody'},
+            {'author': USERNAME1},
+            {'text': 'Дата', 'author': USERNAME1, 'pub_date': 'вчера'},
+        ]), 'post')
+        self.assertEqual(Post.objects.get().text, 'Пост')
+        self.assertIn('записано 1, пропущено 3', output)
+        for number in (2, 3, 4):
+            with self.subTest(number=number):
+                self.assertIn(f'Запись {number} пропущена', errors)
+
+    def test_comments_on_missing_posts_are_skipped(self):
+        user = User.objects.create_user(username=USERNAME1)
+        post = Post.objects.create(text='Пост', author=user)
+        output, errors = self.load(self.write(
+            'comments.csv',
+            'post,author,text\n'
+            f'{post.pk},{USERNAME1},Есть\n'
+            f'999,{USERNAME1},Нет\n'
+            f'x,{USERNAME1},Не число\n',
+        ), 'comment')
+        self.assertEqual(Comment.objects.get().text, 'Есть')
+        self.assertIn('записано 1, пропущено 2', output)
+        self.assertIn("Запись 2 пропущена: нет записи '999'", errors)
+
+    def test_imported_images_are_referenced(self):
+        User.objects.create_user(username=USERNAME1)
+        self.load(self.write_jsonl('posts.jsonl', [
+            {'text': f'Пост {i}', 'author': USERNAME1, 'image': IMAGE}
+            for i in range(2)
+        ]), 'post')
+        self.assertEqual(StoredImage.objects.get(name=IMAGE).references, 2)
+
+    def test_resumes_after_last_committed_chunk(self):
+        User.objects.create_user(username=USERNAME1)
+        path = self.write_jsonl('posts.jsonl', [
+            {'text': f'Пост {i}', 'author': USERNAME1} for i in range(5)
+        ])
+        self.write('posts.jsonl.progress', '3')
+        self.load(path, 'post', resume=True, chunk_size=1)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        self.assertFalse(os.path.exists(path + '.progress'))
@@ -0,0 +1,140 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import paginators
+from posts.models import Post, User
+from posts.paginators import decode_cursor, encode_cursor
+
+USERNAME = 'Oleg'
+INDEX = reverse('index')
+POSTS_COUNT = 25
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(POSTS_COUNT)
+        )
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_page(self, **params):
+        return self.guest_client.get(INDEX, params).context['page']
+
+    def test_cursor_walks_whole_feed(self):
+        expected = list(Post.objects.values_list('pk', flat=True))
+        page = self.get_page()
+        seen = [post.pk for post in page]
+        while page.next_cursor:
+            page = self.get_page(cursor=page.next_cursor)
+            seen += [post.pk for post in page]
+        self.assertEqual(seen, expected)
+        self.assertEqual(page.number, 3)
+
+    def test_previous_cursor_returns_to_same_page(self):
+        first = self.get_page()
+        second = self.get_page(cursor=first.next_cursor)
+        back = self.get_page(cursor=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertIsNone(back.previous_cursor)
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_cursor_page_does_not_count(self):
+        first = self.get_page()
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(INDEX, {'cursor': first.next_cursor})
+        for query in queries.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('__COUNT', query['sql'].upper())
+                self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_legacy_page_number_fallback(self):
+        page = self.get_page(page=2)
+        expected = list(Post.objects.all()[10:20])
+        self.assertEqual(list(page), expected)
+        following = self.get_page(cursor=page.next_cursor)
+        self.assertEqual(list(following), list(Post.objects.all()[20:]))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self.get_page(cursor='not-a-cursor')
+        self.assertEqual(list(page), list(Post.objects.all()[:10]))
+
+    def test_forged_cursor_does_not_poison_shared_fragment(self):
+        author = User.objects.create_user(username='Olegson')
+        posts = [
+            Post.objects.create(text=f'Запись {i}', author=author)
+            for i in range(3)
+        ]
+        profile = reverse('profile', args=[author.username])
+        forged = encode_cursor(posts[1].pub_date, posts[1].pk, 1)
+        response = self.guest_client.get(profile, {'cursor': forged})
+        self.assertNotContains(response, 'Запись 2')
+        response = Client().get(profile)
+        for post in posts:
+            with self.subTest(post=post.text):
+                self.assertContains(response, post.text)
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        token = encode_cursor(post.pub_date, post.pk, 4, backwards=True)
+        self.assertEqual(
+            decode_cursor(token), (post.pub_date, post.pk, 4, True)
+        )
+
+
+class CachedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(POSTS_COUNT)
+        )
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_a_window_of_page_links_is_rendered(self):
+        cache.set(paginators.COUNT_KEY.format('index'), (10000, 0), None)
+        with mock.patch('django.db.transaction.on_commit'):
+            response = self.guest_client.get(INDEX, {'page': 2})
+        self.assertEqual(
+            list(response.context['page'].page_window), [1, 2, 3, 4]
+        )
+        self.assertContains(response, '?page=', count=3)
+        self.assertContains(response, '?page=1000')
+
+    def test_missing_count_is_refreshed_after_commit(self):
+        with mock.patch('django.db.transaction.on_commit') as on_commit:
+            with self.assertNumQueries(0):
+                count = paginators.cached_count('index', Post.objects.all())
+                paginators.cached_count('index', Post.objects.all())
+        self.assertIsNone(count)
+        on_commit.assert_called_once()
+        paginators.refresh_count('index', Post.objects.all())
+        self.assertEqual(
+            paginators.cached_count('index', Post.objects.all()),
+            POSTS_COUNT,
+        )
+
+    def test_index_does_not_count_posts(self):
+        paginators.refresh_count('index', Post.objects.all())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(INDEX, {'page': 2})
+        self.assertEqual(response.context['page'].last_number, 3)
+        for query in queries.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('__COUNT', query['sql'].upper())
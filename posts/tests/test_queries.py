@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+SLUG = 'slug'
+INDEX = reverse('index')
+FOLLOW_INDEX = reverse('follow_index')
+GROUP = reverse('group', args=[SLUG])
+OLEG_PROFILE = reverse('profile', args=[USERNAME1])
+POSTS_COUNT = 10
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание группы',
+            slug=SLUG,
+        )
+        Follow.objects.create(user=cls.olegson_user, author=cls.oleg_user)
+        for i in range(POSTS_COUNT):
+            post = Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.oleg_user,
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post,
+                author=cls.olegson_user,
+                text='Комментарий',
+            )
+        cls.guest_client = Client()
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_query_counts(self):
+        # Session and user lookups account for two queries of every
+        # authorized request.
+        query_counts = {
+            self.guest_client: {
+                INDEX: 1,
+                GROUP: 2,
+                OLEG_PROFILE: 2,
+            },
+            self.olegson_client: {
+                INDEX: 3,
+                GROUP: 4,
+                OLEG_PROFILE: 5,
+                FOLLOW_INDEX: 5,
+            },
+        }
+        for client, urls in query_counts.items():
+            for url, expected in urls.items():
+                with self.subTest(url=url, client=client):
+                    cache.clear()
+                    with self.assertNumQueries(expected):
+                        response = client.get(url)
+                    self.assertEqual(len(response.context['page']), 10)
+
+    def test_feed_shows_comments_count(self):
+        response = self.olegson_client.get(INDEX)
+        for post in response.context['page']:
+            with self.subTest(post=post.pk):
+                self.assertEqual(post.comments_count, 1)
+        self.assertContains(response, 'Добавить комментарий (1)', count=10)
+
+
+class CommentQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.quiet_post = Post.objects.create(
+            text='Тихий', author=cls.oleg_user,
+        )
+        cls.post = Post.objects.create(
+            text='Популярный', author=cls.oleg_user,
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text=f'Комментарий {i}')
+            for post, count in ((cls.quiet_post, 1), (cls.post, 45))
+            for i, author in zip(
+                range(count), [cls.oleg_user, cls.olegson_user] * count,
+            )
+        )
+        cls.POST = reverse('post', args=[USERNAME1, cls.post.pk])
+        cls.QUIET_POST = reverse('post', args=[USERNAME1, cls.quiet_post.pk])
+        cls.COMMENTS = reverse('post_comments', args=[USERNAME1, cls.post.pk])
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_page_costs_the_same_for_any_number_of_comments(self):
+        with self.assertNumQueries(2):
+            self.guest_client.get(self.QUIET_POST)
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(self.POST)
+        self.assertEqual(len(response.context['comments_page']), 20)
+        self.assertContains(response, self.COMMENTS)
+
+    def test_comments_fragment_pages_through_all_comments(self):
+        response = self.guest_client.get(self.POST)
+        seen = [comment.pk for comment in response.context['comments_page']]
+        cursor = response.context['comments_page'].next_cursor
+        while cursor:
+            with self.assertNumQueries(2):
+                response = self.guest_client.get(
+                    self.COMMENTS, {'cursor': cursor},
+                )
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            page = response.context['comments_page']
+            seen += [comment.pk for comment in page]
+            cursor = page.next_cursor
+        self.assertEqual(
+            seen,
+            list(
+                self.post.comments.order_by('-created', '-pk')
+                .values_list('pk', flat=True)
+            ),
+        )
+        self.assertNotContains(response, 'Показать ещё')
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, CommentSearchTerm, Post, SearchTerm, User
+
+USERNAME = 'Oleg'
+SEARCH = reverse('search')
+ADMIN_POSTS = reverse('admin:posts_post_changelist')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username=USERNAME, email='oleg@example.com', password='pass',
+        )
+        cls.cats = Post.objects.create(
+            text='Кошки и кошка: о кошках', author=cls.user,
+        )
+        cls.cat_and_dog = Post.objects.create(
+            text='Кошка гуляла с собакой', author=cls.user,
+        )
+        cls.dog = Post.objects.create(
+            text='Собаки любят гулять', author=cls.user,
+        )
+        cls.guest_client = Client()
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.user)
+
+    def find(self, query):
+        return list(search.search(Post.objects.all(), query))
+
+    def test_word_forms_match(self):
+        self.assertEqual(self.find('кошкам'), [self.cats, self.cat_and_dog])
+        self.assertEqual(self.find('Гулять собаке'), [
+            self.dog, self.cat_and_dog,
+        ])
+
+    def test_all_terms_are_required(self):
+        self.assertEqual(self.find('кошка собака'), [self.cat_and_dog])
+        self.assertEqual(self.find('кошка слон'), [])
+        self.assertEqual(self.find('и'), [])
+
+    def test_index_follows_edits(self):
+        post = Post.objects.get(pk=self.dog.pk)
+        post.text = 'Слоны любят гулять'
+        post.save()
+        self.assertEqual(self.find('слон'), [self.dog])
+        self.assertEqual(self.find('собака'), [self.cat_and_dog])
+
+    def test_search_page(self):
+        response = self.guest_client.get(SEARCH, {'q': 'кошки'})
+        self.assertEqual(list(response.context['page']), [
+            self.cats, self.cat_and_dog,
+        ])
+        self.assertContains(response, 'гуляла с собакой')
+        self.assertNotContains(response, 'Собаки любят')
+
+    def test_admin_lists_posts_by_rank(self):
+        response = self.admin_client.get(ADMIN_POSTS, {'q': 'кошка'})
+        self.assertEqual(list(response.context['cl'].result_list), [
+            self.cats, self.cat_and_dog,
+        ])
+        response = self.admin_client.get(ADMIN_POSTS, {'q': 'и'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_comments_are_searched(self):
+        comment = Comment.objects.create(
+            post=self.dog, author=self.user, text='Собаки гуляли',
+        )
+        Comment.objects.create(
+            post=self.dog, author=self.user, text='Кошки гуляли',
+        )
+        self.assertEqual(
+            list(search.search(Comment.objects.all(), 'собака')), [comment],
+        )
+
+    def test_rebuild_command(self):
+        comment = Comment.objects.create(
+            post=self.dog, author=self.user, text='Кошка',
+        )
+        SearchTerm.objects.all().delete()
+        CommentSearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+        self.assertEqual(self.find('кошка'), [self.cats, self.cat_and_dog])
+        self.assertEqual(
+            list(search.search(Comment.objects.all(), 'кошки')), [comment],
+        )
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, StoredImage, User
+from posts.storage import is_hashed
+
+USERNAME = 'Oleg'
+NEW = reverse('new_post')
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def gif(name='small.gif'):
+    return SimpleUploadedFile(name, SMALL_GIF, 'image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch('django.db.transaction.on_commit', lambda callback: callback())
+@mock.patch('posts.thumbnails.schedule', mock.Mock())
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def publish(self, name):
+        self.author_client.post(NEW, {'text': 'Текст', 'image': gif(name)})
+        return Post.objects.latest('pk')
+
+    def references(self, name):
+        return StoredImage.objects.get(name=name).references
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.publish('first.gif')
+        second = self.publish('second.gif')
+        name = first.image.name
+        self.assertTrue(is_hashed(name))
+        self.assertRegex(name, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/')
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(self.references(name), 2)
+        storage = first.image.storage
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(StoredImage.objects.filter(name=name).exists())
+
+    def test_reused_file_survives_release_of_its_last_post(self):
+        first = self.publish('first.gif')
+        storage = first.image.storage
+        # The same content is stored again while its only post goes away.
+        name = storage.save('posts/again.gif', gif())
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        post = Post.objects.create(text='Текст', author=self.user, image=name)
+        self.assertEqual(self.references(name), 1)
+        post.delete()
+        self.assertFalse(storage.exists(name))
+
+    def test_same_image_uploaded_again_on_edit(self):
+        post = self.publish('first.gif')
+        name = post.image.name
+        edit = reverse('post_edit', args=[USERNAME, post.pk])
+        self.author_client.post(edit, {'text': 'Текст', 'image': gif()})
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertEqual(self.references(name), 1)
+        post.delete()
+        self.assertFalse(post.image.storage.exists(name))
+
+    def test_replaced_image_is_released(self):
+        post = self.publish('first.gif')
+        old = post.image.name
+        post.image.save('other.txt', ContentFile(b'other'))
+        self.assertNotEqual(post.image.name, old)
+        self.assertFalse(post.image.storage.exists(old))
+        self.assertEqual(self.references(post.image.name), 1)
+
+    def test_migration_command(self):
+        post = Post.objects.create(text='Текст', author=self.user)
+        storage = post.image.storage
+        with open(storage.path('posts/flat.gif'), 'wb') as flat:
+            flat.write(SMALL_GIF)
+        Post.objects.filter(pk=post.pk).update(image='posts/flat.gif')
+        call_command('migrate_image_storage', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(is_hashed(post.image.name))
+        self.assertEqual(post.image.read(), SMALL_GIF)
+        self.assertFalse(storage.exists('posts/flat.gif'))
+        self.assertEqual(self.references(post.image.name), 1)
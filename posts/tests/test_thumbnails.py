@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post, User
+
+USERNAME = 'Oleg'
+INDEX = reverse('index')
+NEW = reverse('new_post')
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(name='photo.jpg', size=(1200, 800)):
+    content = BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(content, 'JPEG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост', author=self.user, image=jpeg(),
+        )
+
+    def test_page_never_resizes_inline(self):
+        with mock.patch('sorl.thumbnail.default.engine.get_image') as decode:
+            response = self.author_client.get(INDEX)
+        decode.assert_not_called()
+        self.assertContains(response, f'src="{self.post.image.url}"')
+
+    def test_page_shows_generated_thumbnail(self):
+        self.author_client.get(INDEX)
+        thumbnails._generate(self.post.pk)
+        response = self.author_client.get(INDEX)
+        picture = thumbnails.lookup(self.post.image)
+        self.assertContains(response, f'src="{picture.img.url}"')
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'type="image/webp"')
+        for format_, files in picture.sources.items():
+            with self.subTest(format=format_):
+                self.assertEqual(
+                    [(file.width, file.height) for file in files],
+                    [(320, 113), (640, 226), (960, 339)],
+                )
+                self.assertContains(response, f'{files[0].url} 320w')
+        self.assertTrue(picture.sources['WEBP'][0].name.endswith('.webp'))
+
+    def test_attach_looks_up_page_in_one_batch(self):
+        # Different sizes, or the posts would share one stored image.
+        posts = [self.post] + [
+            Post.objects.create(
+                text='Пост',
+                author=self.user,
+                image=jpeg(size=(1000 + i, 800)),
+            )
+            for i in range(2)
+        ]
+        posts.append(Post.objects.create(text='Пост', author=self.user))
+        for post in posts[:2]:
+            thumbnails._generate(post.pk)
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.attach(posts)
+        with self.assertNumQueries(0):
+            thumbnails.attach(posts)
+        self.assertEqual(
+            posts[0].thumbnail.img.name,
+            thumbnails.lookup(self.post.image).img.name,
+        )
+        self.assertEqual(posts[1].thumbnail.img.width, 960)
+        self.assertIsNone(posts[2].thumbnail)
+        self.assertIsNone(posts[3].thumbnail)
+
+    def test_new_post_schedules_generation(self):
+        with mock.patch('posts.background.defer') as defer:
+            self.author_client.post(NEW, {'text': 'Текст', 'image': jpeg()})
+        post = Post.objects.latest('pk')
+        defer.assert_called_once_with(thumbnails._generate, post.pk)
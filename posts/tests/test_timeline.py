@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, PulledAuthor, TimelineEntry, User
+
+USERNAME1 = 'Oleg'
+USERNAME2 = 'Olegson'
+USERNAME3 = 'Olegovich'
+FOLLOW_INDEX = reverse('follow_index')
+OLEG_FOLLOW = reverse('profile_follow', args=[USERNAME1])
+OLEG_UNFOLLOW = reverse('profile_unfollow', args=[USERNAME1])
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.oleg_user = User.objects.create_user(username=USERNAME1)
+        cls.olegson_user = User.objects.create_user(username=USERNAME2)
+        cls.olegson_client = Client()
+        cls.olegson_client.force_login(cls.olegson_user)
+
+    def setUp(self):
+        self.old_post = Post.objects.create(
+            text='Старый пост',
+            author=self.oleg_user,
+        )
+
+    def timeline_posts(self):
+        return list(
+            TimelineEntry.objects
+            .filter(user=self.olegson_user)
+            .values_list('post', flat=True)
+        )
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        self.olegson_client.get(OLEG_FOLLOW)
+        self.assertEqual(self.timeline_posts(), [self.old_post.pk])
+        new_post = Post.objects.create(
+            text='Новый пост',
+            author=self.oleg_user,
+        )
+        self.assertEqual(
+            self.timeline_posts(), [new_post.pk, self.old_post.pk]
+        )
+        response = self.olegson_client.get(FOLLOW_INDEX)
+        self.assertEqual(list(response.context['page']), [
+            new_post, self.old_post
+        ])
+
+    def test_unfollow_prunes_timeline(self):
+        self.olegson_client.get(OLEG_FOLLOW)
+        self.olegson_client.get(OLEG_UNFOLLOW)
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.olegson_user, author=self.oleg_user)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [self.old_post.pk])
+
+    @override_settings(FEED_FANOUT_FOLLOWERS_LIMIT=1)
+    def test_hybrid_feed_merges_pulled_authors(self):
+        other_user = User.objects.create_user(username=USERNAME3)
+        Follow.objects.create(user=other_user, author=self.oleg_user)
+        Follow.objects.create(user=self.olegson_user, author=self.oleg_user)
+        Follow.objects.create(user=self.olegson_user, author=other_user)
+        self.assertTrue(
+            PulledAuthor.objects.filter(author=self.oleg_user).exists()
+        )
+        pushed = Post.objects.create(text='Пост', author=other_user)
+        pulled = Post.objects.create(text='Пост', author=self.oleg_user)
+        self.assertNotIn(pulled.pk, self.timeline_posts())
+        expected = [pulled, pushed, self.old_post]
+        for params in ({}, {'page': 1}):
+            with self.subTest(params=params):
+                response = self.olegson_client.get(FOLLOW_INDEX, params)
+                self.assertEqual(list(response.context['page']), expected)
+                self.assertEqual(response.context['paginator'].count, 3)
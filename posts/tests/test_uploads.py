@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+USERNAME = 'Oleg'
+NEW = reverse('new_post')
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+ROTATED = 6
+
+
+def photo(size=(1500, 1000), orientation=None):
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    if orientation:
+        exif[ORIENTATION] = orientation
+    content = BytesIO()
+    Image.new('RGB', size, (10, 120, 200)).save(
+        content, 'JPEG', exif=exif.tobytes(),
+    )
+    return SimpleUploadedFile('photo.jpg', content.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, POST_IMAGE_MAX_SIDE=600)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def publish(self, image):
+        return self.author_client.post(NEW, {'text': 'Текст', 'image': image})
+
+    def test_master_is_downscaled_and_stripped(self):
+        self.publish(photo(orientation=ROTATED))
+        with Image.open(Post.objects.get().image) as stored:
+            self.assertEqual(stored.size, (400, 600))
+            self.assertNotIn('exif', stored.info)
+
+    @override_settings(POST_IMAGE_MAX_SIZE=2 ** 20)
+    def test_oversized_file_is_rejected(self):
+        # Cut off before it is parsed, so the content does not matter.
+        response = self.publish(SimpleUploadedFile(
+            'photo.jpg', bytes(2 ** 21), 'image/jpeg',
+        ))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл изображения больше 1 МБ.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=10 ** 6)
+    def test_too_many_pixels_are_rejected(self):
+        response = self.publish(photo())
+        self.assertFormError(
+            response, 'form', 'image', 'Изображение больше 1 мегапикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
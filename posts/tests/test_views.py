@@ -194,8 +194,11 @@ class PagesTests(TestCase):
 
     def test_cache(self):
         test_page = self.guest_client.get(INDEX).content
-        self.post.text = 'Новый текст поста'
-        self.post.save()
+        # Saved posts refresh the page: only a write that sends no
+        # signals leaves it cached.
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Новый текст поста',
+        )
         page1 = self.guest_client.get(INDEX).content
         self.assertEqual(page1, test_page)
         cache.clear()
@@ -0,0 +1,171 @@
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import background, caching
+from .models import Post
+
+# Cards show post images cropped to this size at most; narrower screens
+# get one of the narrower variants of the same crop.
+CARD_WIDTH = 960
+CARD_HEIGHT = 339
+WIDTHS = (320, 640, CARD_WIDTH)
+# WebP first: browsers take the first <source> type they support, and
+# JPEG is the fallback for those that support none.
+FORMATS = ('WEBP', 'JPEG')
+QUALITY = 80
+SIZES = '(min-width: 1200px) 1110px, 100vw'
+
+
+def variant(width, format_):
+    height = round(width * CARD_HEIGHT / CARD_WIDTH)
+    return f'{width}x{height}', {
+        'crop': 'center',
+        'upscale': True,
+        'format': format_,
+        'quality': QUALITY,
+    }
+
+
+# Every variant of a post image that pages show, generated ahead of time.
+VARIANTS = tuple(
+    variant(width, format_) for format_ in FORMATS for width in WIDTHS
+)
+
+
+class Picture:
+    def __init__(self, files):
+        self.sources = {
+            format_: files[index * len(WIDTHS):(index + 1) * len(WIDTHS)]
+            for index, format_ in enumerate(FORMATS)
+        }
+        self.img = self.sources['JPEG'][-1]
+        self.sizes = SIZES
+
+    @staticmethod
+    def srcset(files):
+        return ', '.join(f'{file.url} {file.width}w' for file in files)
+
+    @property
+    def webp_srcset(self):
+        return self.srcset(self.sources['WEBP'])
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset(self.sources['JPEG'])
+
+
+def normalize_options(source, options):
+    # Mirrors sorl's ThumbnailBackend.get_thumbnail(), so that a lookup
+    # arrives at the same file name as the generation did.
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', default.backend._get_format(source))
+    for key, value in default.backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in default.backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, geometry, options):
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, normalize_options(source, options),
+    )
+    return ImageFile(name, default.storage)
+
+
+def _read_raw(keys):
+    """Return the raw kvstore values of ``keys`` with two reads at most.
+
+    Same lookups as sorl's cached_db store makes one key at a time: the
+    cache first, then the database for the keys the cache lacks, with
+    the answers cached back, absent keys included.
+    """
+    store = default.kvstore
+    if not keys:
+        return {}
+    if not isinstance(store, CachedDBStore):
+        return {key: store._get_raw(key) for key in keys}
+    found = store.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        loaded = dict(
+            KVStoreModel.objects
+            .filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        fetched = {key: loaded.get(key, EMPTY_VALUE) for key in missing}
+        store.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(fetched)
+    return {
+        key: None if value == EMPTY_VALUE else value
+        for key, value in found.items()
+    }
+
+
+def prefetch(images):
+    """Return the :class:`Picture` of every ready image, by image name.
+
+    The variants of all ``images`` are looked up together: one cache
+    ``get_many`` and, for whatever the cache lacks, one database query.
+    Unlike ``{% thumbnail %}`` this never decodes or resizes anything.
+    """
+    keys = {
+        image.name: [
+            add_prefix(thumbnail_file(image, geometry, options).key)
+            for geometry, options in VARIANTS
+        ]
+        for image in images if image
+    }
+    raw = _read_raw(list({key for names in keys.values() for key in names}))
+    pictures = {}
+    for name, image_keys in keys.items():
+        values = [raw.get(key) for key in image_keys]
+        if None not in values:
+            pictures[name] = Picture(
+                [deserialize_image_file(value) for value in values]
+            )
+    return pictures
+
+
+def lookup(image):
+    """Return the :class:`Picture` of ``image`` or None if not ready."""
+    return prefetch([image]).get(image.name) if image else None
+
+
+def generate(post):
+    for geometry, options in VARIANTS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+def _generate(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id,
+    ).first()
+    if post is None or not post.image:
+        return
+    generate(post)
+    # Pages and cards showing the original get rendered anew.
+    caching.bump_post(post)
+
+
+def schedule(post):
+    if post.image:
+        background.defer(_generate, post.pk)
+
+
+def attach(posts):
+    """Set ``post.thumbnail`` to the ready card picture or None."""
+    pictures = prefetch(post.image for post in posts)
+    for post in posts:
+        post.thumbnail = pictures.get(post.image.name)
+    return posts
@@ -0,0 +1,209 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Follow, Post, PulledAuthor, TimelineEntry, UserStats
+from .paginators import seek
+
+BATCH_SIZE = 1000
+
+
+def followers_limit():
+    return settings.FEED_FANOUT_FOLLOWERS_LIMIT
+
+
+def is_pulled(author_id):
+    return PulledAuthor.objects.filter(pk=author_id).exists()
+
+
+def refresh_pulled(author_id):
+    # Authors are only promoted here; demotion happens on rebuild, where
+    # their timelines get backfilled in the same pass.
+    followers = (
+        UserStats.objects
+        .filter(pk=author_id)
+        .values_list('followers_count', flat=True)
+        .first()
+    )
+    if followers is None:
+        followers = Follow.objects.filter(author_id=author_id).count()
+    if followers > followers_limit():
+        PulledAuthor.objects.get_or_create(author_id=author_id)
+        return True
+    return is_pulled(author_id)
+
+
+def _insert(entries, batch_size=BATCH_SIZE):
+    entries = iter(entries)
+    inserted = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return inserted
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        inserted += len(batch)
+
+
+def fan_out(post):
+    if is_pulled(post.author_id):
+        return 0
+    followers = (
+        Follow.objects
+        .filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+        .iterator()
+    )
+    return _insert(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers
+    )
+
+
+def backfill(user_id, author_id):
+    if refresh_pulled(author_id):
+        return 0
+    posts = (
+        Post.objects
+        .filter(author_id=author_id)
+        .values_list('id', 'pub_date')
+        .iterator()
+    )
+    return _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    return TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()[0]
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    TimelineEntry.objects.all().delete()
+    PulledAuthor.objects.all().delete()
+    PulledAuthor.objects.bulk_create(
+        PulledAuthor(author_id=author_id)
+        for author_id in (
+            Follow.objects
+            .values('author_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=followers_limit())
+            .values_list('author_id', flat=True)
+        )
+    )
+    follows = (
+        Follow.objects
+        .exclude(user=None)
+        .exclude(author=None)
+        .filter(author__pulled_feed__isnull=True)
+        .order_by('author_id')
+        .values_list('author_id', 'user_id')
+        .iterator()
+    )
+    author_id, followers = None, []
+    for follow_author_id, user_id in follows:
+        if follow_author_id != author_id and followers:
+            yield author_id, _rebuild_author(author_id, followers, batch_size)
+            followers = []
+        author_id = follow_author_id
+        followers.append(user_id)
+    if followers:
+        yield author_id, _rebuild_author(author_id, followers, batch_size)
+
+
+def backfill_followers(author_id, batch_size=BATCH_SIZE):
+    followers = list(
+        Follow.objects
+        .filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+    return _rebuild_author(author_id, followers, batch_size)
+
+
+def _rebuild_author(author_id, followers, batch_size):
+    posts = list(
+        Post.objects
+        .filter(author_id=author_id)
+        .values_list('id', 'pub_date')
+    )
+    return _insert(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in followers
+            for post_id, pub_date in posts
+        ),
+        batch_size,
+    )
+
+
+class FollowFeed:
+    """Hybrid follow feed of a user.
+
+    Posts of regular authors are read from the user's materialized
+    timeline, posts of authors with too many followers to fan out are
+    pulled from their own recent posts. Both sources are k-way merged by
+    ``(pub_date, id)``.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def pulled_author_ids(self):
+        if not hasattr(self, '_pulled'):
+            self._pulled = list(
+                Follow.objects
+                .filter(user=self.user, author__pulled_feed__isnull=False)
+                .values_list('author_id', flat=True)
+            )
+        return self._pulled
+
+    def posts(self):
+        return Post.objects.for_feed()
+
+    def seek_keys(self, after=None, backwards=False, limit=None):
+        """Return the ``(pub_date, post id)`` keys of a page of the feed.
+
+        Only index columns are read, so callers choose how to load the
+        posts themselves.
+        """
+        streams = [seek(
+            self.user.timeline.values_list('pub_date', 'post_id'),
+            after, backwards, limit, pk='post_id',
+        )]
+        for author_id in self.pulled_author_ids():
+            streams.append(seek(
+                Post.objects
+                .filter(author_id=author_id)
+                .values_list('pub_date', 'pk'),
+                after, backwards, limit,
+            ))
+        keys, seen = [], set()
+        for key in heapq.merge(*streams, reverse=not backwards):
+            if key[1] in seen:
+                continue
+            seen.add(key[1])
+            keys.append(key)
+            if len(keys) == limit:
+                break
+        return keys
+
+    def seek(self, after=None, backwards=False, limit=None):
+        keys = self.seek_keys(after, backwards, limit)
+        posts = self.posts().in_bulk([post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
+
+    def count(self):
+        return Post.objects.filter(
+            Q(timeline_entries__user=self.user)
+            | Q(author_id__in=self.pulled_author_ids())
+        ).distinct().count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self.seek(limit=index + 1)[index]
+        return self.seek(limit=index.stop)[index]
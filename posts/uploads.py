@@ -0,0 +1,98 @@
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+# Formats kept as uploaded when they need no resizing and carry no
+# metadata; everything else is re-encoded as JPEG, or PNG with alpha.
+PASSTHROUGH_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+METADATA = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+JPEG_QUALITY = 90
+
+
+class OversizedUpload(UploadedFile):
+    """Stands in for a file that outgrew the upload limit mid-stream."""
+
+    oversized = True
+
+    def __init__(self, name, content_type, size):
+        super().__init__(None, name, content_type, size)
+
+    def close(self):
+        pass
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Streams uploads to a temporary file in chunks, up to a limit.
+
+    Once a file grows past ``POST_IMAGE_MAX_SIZE`` its remaining chunks
+    are dropped without touching the disk, and the form gets an
+    :class:`OversizedUpload`, which ``forms.LimitedUploadMixin`` rejects.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = False
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_SIZE:
+            if not self.oversized:
+                self.oversized = True
+                self.file.close()
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.oversized:
+            return OversizedUpload(
+                self.file_name, self.content_type, self.received,
+            )
+        return super().file_complete(file_size)
+
+
+def _has_metadata(image):
+    return any(key in image.info for key in METADATA)
+
+
+def master(upload, image):
+    """Return ``upload`` reduced to the master resolution, without EXIF.
+
+    ``image`` is the header the form has already parsed. JPEGs are
+    decoded in draft mode straight at a fraction of their size, so the
+    full-resolution bitmap never has to fit in memory.
+    """
+    limit = settings.POST_IMAGE_MAX_SIDE
+    if (max(image.size) <= limit and image.format in PASSTHROUGH_FORMATS
+            and not _has_metadata(image)):
+        upload.seek(0)
+        return upload
+    upload.seek(0)
+    with Image.open(upload) as source:
+        source.draft('RGB', (limit, limit))
+        alpha = 'A' in source.getbands() or 'transparency' in source.info
+        picture = ImageOps.exif_transpose(source)
+        picture = picture.convert('RGBA' if alpha else 'RGB')
+        picture.thumbnail((limit, limit), Image.LANCZOS, reducing_gap=3.0)
+        format_, extension = ('PNG', '.png') if alpha else ('JPEG', '.jpg')
+        # Spills over to disk past FILE_UPLOAD_MAX_MEMORY_SIZE bytes.
+        result = UploadedFile(
+            SpooledTemporaryFile(settings.FILE_UPLOAD_MAX_MEMORY_SIZE),
+            os.path.splitext(upload.name)[0] + extension,
+            Image.MIME[format_],
+        )
+        # Without an exif= argument Pillow writes no EXIF block at all.
+        picture.save(
+            result,
+            format_,
+            quality=JPEG_QUALITY,
+            optimize=True,
+            icc_profile=source.info.get('icc_profile'),
+        )
+    result.size = result.tell()
+    result.seek(0)
+    return result
@@ -1,11 +1,39 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
+    path('api/batch/', api.batch, name='api_batch'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'
+    ),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group'),
+    path('api/users/<str:username>/', api.profile, name='api_profile'),
+    path(
+        'api/users/<str:username>/info/',
+        api.user_detail,
+        name='api_user'
+    ),
+    path(
+        'api/users/<str:username>/follow/',
+        api.follow_state,
+        name='api_follow_state'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path(
+        'group/<slug:slug>/export/',
+        views.export_group,
+        name='export_group'
+    ),
     path('new/', views.new_post, name='new_post'),
+    path('events/', views.new_posts_events, name='new_posts_events'),
+    path('search/', views.search_posts, name='search'),
     path('<str:username>/', views.profile, name='profile'),
     path(
         '<str:username>/<int:post_id>/',
@@ -18,11 +46,21 @@ urlpatterns = [
         name='post_edit'
     ),
     path('', views.index, name='index'),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<str:username>/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        '<str:username>/export/<slug:kind>/',
+        views.export_user,
+        name='export_user'
+    ),
     path(
         '<str:username>/follow/',
         views.profile_follow,
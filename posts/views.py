@@ -1,34 +1,75 @@
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 
+from . import caching, events, exporter, search, thumbnails
+from .conditional import (conditional_page, group_namespaces,
+                          index_namespaces, post_namespaces,
+                          profile_namespaces)
+from .counters import get_stats
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginators import (COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator,
+                         cached_count, paginate)
+from .timeline import FollowFeed
 
 
+@conditional_page(index_namespaces, comments=True)
 def index(request):
-    list = Post.objects.all()
-    paginator = Paginator(list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(
+        request,
+        Post.objects.for_feed(),
+        count=cached_count('index', Post.objects.all()),
+    )
     return render(
         request,
         'index.html',
-        {'page': page, 'paginator': paginator}
+        {
+            'page': page,
+            'paginator': paginator,
+            'cache_version': caching.version(caching.FEED, caching.COMMENTS),
+        }
     )
 
 
+@conditional_page(group_namespaces, comments=True)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    list = group.posts.all()
-    paginator = Paginator(list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(
+        request,
+        group.posts.for_feed(),
+        count=cached_count(f'group:{group.pk}', group.posts.all()),
+    )
     return render(
         request,
         "group.html",
-        {"group": group, 'page': page, 'paginator': paginator}
+        {
+            "group": group,
+            'page': page,
+            'paginator': paginator,
+            'cache_version': caching.version(
+                caching.group_ns(group.slug), caching.COMMENTS,
+            ),
+        }
+    )
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.none()
+    if query:
+        posts = search.search(Post.objects.for_feed(), query)
+    paginator = Paginator(posts, POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(
+        request,
+        'search.html',
+        {'query': query, 'page': page, 'paginator': paginator}
     )
 
 
@@ -40,16 +81,23 @@ def new_post(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
-    cache.clear()
+    thumbnails.schedule(post)
+    events.publish_post(post)
     return redirect('index')
 
 
+@conditional_page(profile_namespaces, comments=True)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    stats = get_stats(author)
+    paginator, page = paginate(
+        request,
+        author.posts.for_feed(),
+        count=stats.posts_count,
+    )
     following = (
         request.user.is_authenticated and
         Follow.objects.filter(
@@ -62,16 +110,25 @@ def profile(request, username):
         'profile.html',
         {
             'author': author,
+            'stats': stats,
             'page': page,
             'paginator': paginator,
             'following': following,
+            'cache_version': caching.version(
+                caching.author_ns(author.username), caching.COMMENTS,
+            ),
         }
     )
 
 
+@conditional_page(post_namespaces)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id,
+        author__username=username,
+    )
+    comments = post.comments.select_related('author')
     form = CommentForm(request.POST or None)
     following = (
         request.user.is_authenticated and
@@ -85,18 +142,53 @@ def post_view(request, username, post_id):
         'post.html',
         {
             'post': post,
+            'stats': get_stats(post.author),
             'form': form,
+            # The thread itself stays lazy; only its first batch is read.
             'comments': comments,
+            'comments_page': comments_page(comments),
             'following': following,
         }
     )
 
 
+def comments_page(comments, cursor=None):
+    # Comments come newest first, one batch per index seek on
+    # (post, created, id).
+    return CursorPaginator(
+        comments, COMMENTS_PER_PAGE, field='created',
+    ).page(cursor)
+
+
+@conditional_page(post_namespaces)
+def post_comments(request, username, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        pk=post_id,
+        author__username=username,
+    )
+    return render(
+        request,
+        'includes/comment_list.html',
+        {
+            'post': post,
+            'comments_page': comments_page(
+                post.comments.select_related('author'),
+                request.GET.get('cursor'),
+            ),
+        }
+    )
+
+
 @login_required
 def post_edit(request, username, post_id):
     if request.user.username != username:
         return redirect('post', username=username, post_id=post_id)
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        pk=post_id,
+        author__username=username,
+    )
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -104,7 +196,8 @@ def post_edit(request, username, post_id):
     )
     if form.is_valid():
         form.save()
-        cache.clear()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect(
             'post',
             username=username,
@@ -134,6 +227,90 @@ def add_comment(request, username, post_id):
     )
 
 
+def new_posts_events(request):
+    """Stream "N new posts" notifications for one feed as SSE.
+
+    ``?feed=`` is ``index`` (the default), ``group`` with ``?slug=`` or
+    ``follow``. Followed authors are read once, on connection. Posts
+    missed since the ``Last-Event-ID`` of a reconnecting browser are
+    counted in.
+    """
+    feed = request.GET.get('feed', 'index')
+    if feed == 'group':
+        group = get_object_or_404(Group, slug=request.GET.get('slug'))
+        topics = [events.group_topic(group.pk)]
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        topics = [
+            events.author_topic(author_id)
+            for author_id in Follow.objects.filter(
+                user=request.user,
+            ).values_list('author_id', flat=True)
+        ]
+    elif feed == 'index':
+        topics = [events.FEED]
+    else:
+        raise Http404
+    response = StreamingHttpResponse(
+        events.Stream(events.hub.subscribe(
+            topics,
+            events.decode_positions(request.META.get('HTTP_LAST_EVENT_ID')),
+        )),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Tells nginx to pass events on as they come.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def export_response(request, kind, queryset, filename):
+    format_ = request.GET.get('format', 'jsonl')
+    if format_ not in exporter.FORMATS:
+        raise Http404
+    content = exporter.export(kind, queryset, format_)
+    gzipped = re_accepts_gzip.search(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    if gzipped:
+        # Compressed block by block as the rows are read.
+        content = compress_sequence(content)
+    response = StreamingHttpResponse(
+        content,
+        content_type=f'{exporter.CONTENT_TYPES[format_]}; charset=utf-8',
+    )
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{format_}"'
+    )
+    return response
+
+
+@login_required
+def export_user(request, username, kind):
+    if kind not in exporter.MODELS:
+        raise Http404
+    if request.user.username != username and not request.user.is_staff:
+        raise PermissionDenied
+    user = get_object_or_404(User, username=username)
+    return export_response(
+        request,
+        kind,
+        exporter.user_queryset(kind, user),
+        f'{username}-{kind}s',
+    )
+
+
+def export_group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(
+        request, 'post', exporter.group_queryset(group), f'{slug}-posts',
+    )
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -149,10 +326,12 @@ def server_error(request):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user).all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    feed = FollowFeed(request.user)
+    paginator, page = paginate(
+        request,
+        feed,
+        count=cached_count(f'follow:{request.user.pk}', feed),
+    )
     return render(
         request,
         'follow.html',
@@ -135,6 +135,14 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are streamed to temporary files in chunks, and an image is cut
+# off as soon as it outgrows POST_IMAGE_MAX_SIZE bytes.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 25 * 10 ** 6
+# Originals are stored downscaled to fit this many pixels on a side.
+POST_IMAGE_MAX_SIDE = 2048
+
 LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
 LOGOUT_REDIRECT_URL = "index"
@@ -147,4 +155,42 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
-} 
\ No newline at end of file
+}
+
+# Under several worker processes the cache has to be shared, otherwise
+# every worker keeps its own copy of each fragment and misses the
+# invalidations made by the others.
+SHARED_CACHE_LOCATION = os.environ.get('YATUBE_SHARED_CACHE')
+if SHARED_CACHE_LOCATION:
+    CACHES['default'] = {
+        'BACKEND': 'yatube.shared_cache.SharedMemoryCache',
+        'LOCATION': SHARED_CACHE_LOCATION,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+# How long a reverse proxy may serve anonymous feed and post pages.
+PAGE_CACHE_MAX_AGE = 20
+
+# Authors with more followers than this are not fanned out into follower
+# timelines; their posts are pulled into follow feeds at read time.
+FEED_FANOUT_FOLLOWERS_LIMIT = 10000
+
+# Feed sizes behind the page links are recounted in the background once
+# they are older than this many seconds.
+FEED_COUNT_MAX_AGE = 300
+
+# Threads of each process that recount feeds and render thumbnails.
+BACKGROUND_WORKERS = 2
+
+# Seconds between keep-alive comments on idle new post streams, before
+# a closed stream is reopened by the browser, and after which the server
+# closes a stream. Every open stream holds a server thread until then, so
+# the site has to run under threaded workers (gunicorn --worker-class
+# gthread --threads N) with threads to spare for the open tabs; a
+# synchronous worker would be taken up by a single tab. Posts are only
+# announced to streams of the process that saved them: with several
+# worker processes a shared broker has to carry them between processes,
+# which routing streams to fixed workers does not replace.
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY = 5
+EVENTS_MAX_AGE = 60
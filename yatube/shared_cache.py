@@ -0,0 +1,216 @@
+"""Cache backend shared by all worker processes of a host.
+
+Entries live in an SQLite database that should be placed on a RAM-backed
+filesystem such as ``/dev/shm`` and is read through a memory map, so
+every gunicorn worker sees the same entries and invalidations, and a
+fragment is stored once per host instead of once per process.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'yatube.shared_cache.SharedMemoryCache',
+            'LOCATION': '/dev/shm/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+Expired entries are dropped first; when the cache is still over
+``MAX_ENTRIES``, the ``1 / CULL_FREQUENCY`` least recently used entries
+are evicted.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_LOCATION = '/dev/shm/yatube-cache.sqlite3'
+MMAP_SIZE = 256 * 1024 * 1024
+# Recency is tracked with this resolution so that hot keys do not turn
+# every read into a write.
+ACCESS_RESOLUTION = 1.0
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+'''
+
+
+class SharedMemoryCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location or DEFAULT_LOCATION
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        # Connections are per thread and must not survive a fork, which is
+        # how gunicorn starts its workers.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            connection.executescript(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def _keys(self, keys, version):
+        result = {}
+        for key in keys:
+            full_key = self.make_key(key, version=version)
+            self.validate_key(full_key)
+            result[full_key] = key
+        return result
+
+    def _select(self, connection, full_keys, now):
+        placeholders = ','.join('?' * len(full_keys))
+        return connection.execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            [*full_keys, now],
+        ).fetchall()
+
+    def _write(self, connection, rows, now):
+        connection.executemany(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            [
+                (key, pickle.dumps(value, self.pickle_protocol), expires, now)
+                for key, value, expires in rows
+            ],
+        )
+        self._cull(connection, now)
+
+    def _cull(self, connection, now):
+        count, = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count <= self._max_entries:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?', [now])
+        count, = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count <= self._max_entries:
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            [count // self._cull_frequency or 1],
+        )
+
+    def _touch_accessed(self, connection, full_keys, now):
+        placeholders = ','.join('?' * len(full_keys))
+        connection.execute(
+            f'UPDATE cache SET accessed = ? WHERE key IN ({placeholders}) '
+            f'AND accessed < ?',
+            [now, *full_keys, now - ACCESS_RESOLUTION],
+        )
+
+    def get_many(self, keys, version=None):
+        full_keys = self._keys(keys, version)
+        if not full_keys:
+            return {}
+        now = time.time()
+        connection = self._connection
+        rows = self._select(connection, list(full_keys), now)
+        if rows:
+            self._touch_accessed(connection, [key for key, _ in rows], now)
+        return {
+            full_keys[key]: pickle.loads(value) for key, value in rows
+        }
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        full_keys = self._keys(data, version)
+        connection = self._connection
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._write(connection, [
+                (full_key, data[key], expires)
+                for full_key, key in full_keys.items()
+            ], time.time())
+        return []
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key, = self._keys([key], version)
+        now = time.time()
+        connection = self._connection
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            if self._select(connection, [full_key], now):
+                return False
+            expires = self.get_backend_timeout(timeout)
+            self._write(connection, [(full_key, value, expires)], now)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        full_key, = self._keys([key], version)
+        now = time.time()
+        connection = self._connection
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                [full_key, now],
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ?, accessed = ? WHERE key = ?',
+                [pickle.dumps(value, self.pickle_protocol), now, full_key],
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key, = self._keys([key], version)
+        now = time.time()
+        with self._connection as connection:
+            updated = connection.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                [self.get_backend_timeout(timeout), now, full_key, now],
+            ).rowcount
+        return bool(updated)
+
+    def has_key(self, key, version=None):
+        full_key, = self._keys([key], version)
+        return bool(self._select(self._connection, [full_key], time.time()))
+
+    def delete_many(self, keys, version=None):
+        full_keys = list(self._keys(keys, version))
+        if not full_keys:
+            return
+        placeholders = ','.join('?' * len(full_keys))
+        with self._connection as connection:
+            connection.execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', full_keys,
+            )
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def clear(self):
+        with self._connection as connection:
+            connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Keep the per-thread connection open between requests: opening
+        # it again would cost more than the cache saves.
+        pass
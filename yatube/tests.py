@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from yatube.shared_cache import SharedMemoryCache
+
+
+def increment(location, times):
+    cache = SharedMemoryCache(location, {})
+    for _ in range(times):
+        cache.incr('hits')
+
+
+class SharedMemoryCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SharedMemoryCache(self.location, {'OPTIONS': options})
+
+    def test_get_many_and_set_many(self):
+        self.cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]}
+        )
+        self.assertFalse(self.cache.add('a', 3))
+        self.assertTrue(self.cache.add('c', 3))
+        self.cache.delete_many(['a', 'c'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'b': [2]})
+
+    def test_entries_expire(self):
+        now = time.time()
+        self.cache.set('key', 'value', 10)
+        with mock.patch('time.time', return_value=now + 11):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=4)
+        now = time.time()
+        for offset, key in enumerate('abc'):
+            with mock.patch('time.time', return_value=now + offset * 10):
+                cache.set(key, key)
+        with mock.patch('time.time', return_value=now + 30):
+            cache.get('a')
+        with mock.patch('time.time', return_value=now + 40):
+            cache.set('d', 'd')
+        self.assertEqual(
+            sorted(cache.get_many('abcd')), ['a', 'c', 'd']
+        )
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('hits', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.make_cache().get('hits'), 200)
+
+    def test_incr_missing_key(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')